@@ -0,0 +1,224 @@
+""" The benchmarks of the training and simulation hot paths.
+
+Usage: python3 -m benchmarks.run [-o results.json] [--compare old.json]
+
+Every benchmark reports its throughput, and the results are written as a JSON
+file so that the runs before and after a change can be compared.
+"""
+
+import argparse
+import functools
+import json
+import multiprocessing
+import pathlib
+import platform
+import time
+
+import numpy as np
+
+from pso_car.backend.car import Car
+from pso_car.backend.engine import PSOEngine
+from pso_car.backend.episode import run_episode
+from pso_car.backend.individual import Individual
+from pso_car.backend.loader import read_maps, read_training_datasets
+from pso_car.backend.lookup import LookupTable
+from pso_car.backend.rbfn import RBFN
+
+RADAR_DIRECTIONS = ('front', 'left', 'right')
+
+
+def measure(func, min_time=0.5, min_repeat=3):
+    """Call `func` repeatedly for at least `min_time` seconds and
+    `min_repeat` times. Return the mean seconds per call."""
+    repeat = 0
+    start = time.perf_counter()
+    while True:
+        func()
+        repeat += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time and repeat >= min_repeat:
+            return elapsed / repeat
+
+
+def bench_update_fitness(datasets, nneuron=6):
+    results = []
+    for name, dataset in datasets.items():
+        np.random.seed(0)
+        indiv = Individual(dataset, nneuron, 5, 10)
+        seconds = measure(indiv.update_fitness)
+        results.append({
+            'name': 'update_fitness[{}]'.format(name),
+            'seconds': seconds,
+            'throughput': 1 / seconds,
+            'unit': 'evaluations/sec'
+        })
+    return results
+
+
+def bench_pso_iteration(dataset, population_sizes=(100, 1000, 10000),
+                        nneuron=6):
+    results = []
+    for population_size in population_sizes:
+        for is_multicore in (False, True):
+            np.random.seed(0)
+            engine = PSOEngine(1, population_size, 1, 2, 3, 5, nneuron,
+                               dataset, 10, is_multicore)
+            with engine:
+                def iterate():
+                    # `iterate` continues from the last iteration, so rewind
+                    # it to evaluate the swarm once per call
+                    engine.iteration = 0
+                    for _ in engine.iterate():
+                        pass
+                seconds = measure(iterate, min_repeat=1)
+            results.append({
+                'name': 'pso_iteration[{}, {}]'.format(
+                    population_size,
+                    'multicore' if is_multicore else 'single-core'),
+                'seconds': seconds,
+                'throughput': population_size / seconds,
+                'unit': 'evaluations/sec'
+            })
+    return results
+
+
+def bench_car_queries(maps):
+    results = []
+    for name, data in maps.items():
+        car = Car(data['start_pos'], data['start_angle'], 3,
+                  data['route_edge'])
+
+        def dist():
+            for direction in RADAR_DIRECTIONS:
+                car.dist(direction)
+
+        seconds = measure(dist) / len(RADAR_DIRECTIONS)
+        results.append({
+            'name': 'car_dist[{}]'.format(name),
+            'seconds': seconds,
+            'throughput': 1 / seconds,
+            'unit': 'queries/sec'
+        })
+        seconds = measure(lambda: car.is_collided)
+        results.append({
+            'name': 'car_is_collided[{}]'.format(name),
+            'seconds': seconds,
+            'throughput': 1 / seconds,
+            'unit': 'queries/sec'
+        })
+    return results
+
+
+def bench_episodes(maps, dataset, nneuron=6):
+    np.random.seed(0)
+    indiv = Individual(dataset, nneuron, 5, 10)
+    rbfn = RBFN(nneuron, indiv.mean_range, 10)
+    rbfn.load_model(indiv.position)
+    results = []
+    for name, data in maps.items():
+        steps = []
+
+        def episode():
+            car = Car(data['start_pos'], data['start_angle'], 3,
+                      data['route_edge'])
+            trajectory, _ = run_episode(
+                car, functools.partial(rbfn.compile().output, antinorm=True),
+                (data['end_area_lt'], data['end_area_rb']), max_steps=2000)
+            steps.append(len(trajectory))
+
+        seconds = measure(episode, min_repeat=1)
+        results.append({
+            'name': 'episode[{}]'.format(name),
+            'seconds': seconds,
+            'throughput': float(np.mean(steps)) / seconds,
+            'unit': 'steps/sec'
+        })
+    return results
+
+
+def bench_inference(dataset, nneuron=6):
+    np.random.seed(0)
+    indiv = Individual(dataset, nneuron, 5, 10)
+    rbfn = RBFN(nneuron, indiv.mean_range, 10)
+    rbfn.load_model(indiv.position)
+    data = tuple(indiv.inputs[0])
+    results = []
+    for name, predictor in (('rbfn', rbfn), ('compiled', rbfn.compile()),
+                            ('lookup', LookupTable.from_model(rbfn))):
+        seconds = measure(
+            lambda: [predictor.output(data, antinorm=True)
+                     for _ in range(1000)]) / 1000
+        results.append({
+            'name': 'inference[{}]'.format(name),
+            'seconds': seconds,
+            'throughput': 1 / seconds,
+            'unit': 'outputs/sec'
+        })
+    return results
+
+
+def compare(results, baseline):
+    """Print the speedup of every benchmark against the baseline."""
+    baseline = {r['name']: r for r in baseline['results']}
+    for result in results['results']:
+        if result['name'] in baseline:
+            print('{:<45} {:>8.2f}x'.format(
+                result['name'], result['throughput']
+                / baseline[result['name']]['throughput']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the benchmarks.')
+    parser.add_argument('-o', '--output', default=None,
+                        help='the path of the JSON results (default: '
+                        'benchmarks/results/<time>.json)')
+    parser.add_argument('--compare', default=None,
+                        help='the JSON results of a previous run to compare '
+                        'with')
+    parser.add_argument('--population-sizes', type=int, nargs='+',
+                        default=[100, 1000, 10000],
+                        help='the population sizes of the PSO iteration '
+                        'benchmark (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    maps = read_maps()
+    datasets = read_training_datasets()
+    benchmarks = [
+        lambda: bench_update_fitness(datasets),
+        lambda: bench_pso_iteration(datasets['train4dAll'],
+                                    args.population_sizes),
+        lambda: bench_inference(datasets['train4dAll']),
+        lambda: bench_car_queries(maps),
+        lambda: bench_episodes(maps, datasets['train4dAll'])
+    ]
+    results = {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'cpu_count': multiprocessing.cpu_count(),
+        'results': []
+    }
+    for bench in benchmarks:
+        for result in bench():
+            print('{:<45} {:>14.2f} {}'.format(
+                result['name'], result['throughput'], result['unit']))
+            results['results'].append(result)
+
+    if args.output is None:
+        output = pathlib.Path('benchmarks', 'results',
+                              time.strftime('%Y%m%d-%H%M%S.json'))
+    else:
+        output = pathlib.Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with output.open('w') as resfile:
+        json.dump(results, resfile, indent=2)
+    print('The results have been written to {}.'.format(output))
+
+    if args.compare is not None:
+        with open(args.compare) as basefile:
+            compare(results, json.load(basefile))
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    main()
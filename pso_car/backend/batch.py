@@ -0,0 +1,165 @@
+"""
+Define the batch simulator which steps many cars in lockstep. The kinematics,
+the radars and the collision checks are the same as `Car` and `run_episode`,
+but they are array operations over every car still running.
+"""
+
+import numpy as np
+
+from .episode import Outcome
+from .fitness import paired_output
+from .walls import Walls
+
+# the radar directions relative to the car angle: front, right and left
+RADAR_OFFSETS = np.array((0, -45, 45))
+
+
+class ModelController(object):
+    def __init__(self, model):
+        """Drive every car by the same model.
+
+        Args:
+            model (RBFN): The model with method `compile()`, whose result has
+                method `batch_output(data, antinorm)`.
+        """
+
+        self.model = model.compile()
+
+    def __call__(self, dists, _):
+        return self.model.batch_output(dists, antinorm=True)
+
+
+class ParamsController(object):
+    def __init__(self, params, nneuron):
+        """Drive every car by its own RBFN.
+
+        Args:
+            params (numpy.ndarray): The RBFN parameters of every car in shape
+                (ncar, ndim), following the layout of `RBFN.load_model`.
+            nneuron (int): Number of neuron in RBFN without the threshold.
+        """
+
+        self.params = np.atleast_2d(params)
+        self.nneuron = nneuron
+
+    def __call__(self, dists, indices):
+        return paired_output(self.params[indices], self.nneuron, dists,
+                             antinorm=True)
+
+
+class BatchResult(object):
+    def __init__(self, ncar):
+        """The final states of the cars in a batch simulation."""
+        self.positions = np.empty((ncar, 2))
+        self.angles = np.empty(ncar)
+        self.steps = np.zeros(ncar, dtype=int)
+        self.outcomes = np.full(ncar, Outcome.STEP_LIMIT, dtype=object)
+
+    def __len__(self):
+        return len(self.steps)
+
+    def is_outcome(self, outcome):
+        """Get the mask of the cars ending with `outcome`."""
+        return self.outcomes == outcome
+
+
+class BatchSimulator(object):
+    def __init__(self, wall_points, ending_area, radius=3):
+        """The simulator driving many cars on the same map.
+
+        Args:
+            wall_points (list or Walls): The edge points of the map, or the
+                walls built from them.
+            ending_area (tuple): ((left, top), (right, bottom)) of the ending
+                area.
+            radius (int, optional): Defaults to 3. The size (radius) of the
+                cars.
+        """
+
+        if isinstance(wall_points, Walls):
+            self.walls = wall_points
+        else:
+            self.walls = Walls(wall_points)
+        self.ending_lt, self.ending_rb = ending_area
+        self.radius = radius
+
+    def run(self, controller, positions, angles, ncar=None, max_steps=10000):
+        """Drive every car till it arrives at the ending area, collides, or
+        runs out of steps. The cars are retired as soon as they stop.
+
+        Args:
+            controller (callable): Get the wheel angles of the running cars
+                from their (front, right, left) distances in shape (n, 3) and
+                their indices in shape (n,), e.g. `ModelController` and
+                `ParamsController`.
+            positions (numpy.ndarray): The start (x, y) of the cars in shape
+                (ncar, 2), or one (x, y) shared by every car.
+            angles (numpy.ndarray): The start angles in degree of the cars in
+                shape (ncar,), or one angle shared by every car.
+            ncar (int, optional): Defaults to None. The number of cars. It is
+                derived from `positions` and `angles` if None.
+            max_steps (int, optional): Defaults to 10000. The maximum of moves
+                for each car.
+
+        Returns:
+            BatchResult: The final states, the number of moves and the
+            outcomes of the cars.
+        """
+
+        if ncar is None:
+            ncar = max(len(np.atleast_2d(positions)), np.size(angles))
+        pos = np.broadcast_to(np.asarray(positions, dtype=float),
+                              (ncar, 2)).copy()
+        angle = np.broadcast_to(np.asarray(angles, dtype=float) % 360,
+                                (ncar,)).copy()
+        result = BatchResult(ncar)
+        active = np.arange(ncar)
+        for step in range(max_steps + 1):
+            dists = self.__sense(pos, angle)
+            arrived = ((self.ending_lt[0] <= pos[:, 0])
+                       & (pos[:, 0] <= self.ending_rb[0])
+                       & (self.ending_lt[1] >= pos[:, 1])
+                       & (pos[:, 1] >= self.ending_rb[1]))
+            collided = ~arrived & \
+                (self.walls.collided_batch(pos, self.radius) >= 0)
+            lost = ~arrived & ~collided & np.isnan(dists).any(axis=1)
+            done = arrived | collided | lost
+            if step == max_steps:
+                done[:] = True
+
+            # retire the stopped cars
+            if done.any():
+                retired = active[done]
+                result.positions[retired] = pos[done]
+                result.angles[retired] = angle[done]
+                result.steps[retired] = step
+                result.outcomes[active[arrived]] = Outcome.ARRIVED
+                result.outcomes[active[collided]] = Outcome.COLLIDED
+                result.outcomes[active[lost]] = Outcome.LOST
+                running = ~done
+                active, pos, angle, dists = (active[running], pos[running],
+                                             angle[running], dists[running])
+            if not len(active):
+                break
+
+            self.__move(pos, angle, np.asarray(controller(dists, active),
+                                               dtype=float))
+        return result
+
+    def __sense(self, pos, angle):
+        """Get the (front, right, left) distances of every car."""
+        _, dists = self.walls.cast_batch(
+            np.repeat(pos, len(RADAR_OFFSETS), axis=0),
+            (angle[:, np.newaxis] + RADAR_OFFSETS).ravel() % 360)
+        return dists.reshape(-1, len(RADAR_OFFSETS))
+
+    def __move(self, pos, angle, wheel_angles):
+        """Move every car in place in the same way as `Car.move`."""
+        wheel_angle = np.radians(np.clip(wheel_angles, -40, 40))
+        car_angle = np.radians(angle)
+        pos[:, 0] += np.cos(car_angle + wheel_angle) + \
+            np.sin(wheel_angle) * np.sin(car_angle)
+        pos[:, 1] += np.sin(car_angle + wheel_angle) - \
+            np.sin(wheel_angle) * np.cos(car_angle)
+        angle -= np.degrees(np.arcsin(np.sin(wheel_angle) / self.radius))
+        angle %= 360
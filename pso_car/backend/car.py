@@ -4,7 +4,7 @@ import math
 
 import numpy as np
 
-from .planecoord import Line2D, LineSeg2D
+from .walls import Walls
 
 np.set_printoptions(suppress=True)
 
@@ -18,17 +18,19 @@ class Car(object):
             angle (float): the angle of the car in degree and always in
                 [0, 360).
             radius (int): the size (radius) of the car.
-            wall_points (list): a list with all the edge points of the map.
+            wall_points (list or Walls): a list with all the edge points of
+                the map, or the walls built from them to share with other cars
+                on the same map.
         """
 
         self.pos = list(pos)
         self.angle = angle % 360
         self.radius = radius
         self.wheel_angle = 0
-        self.walls = []
-        for idx in range(len(wall_points) - 1):
-            self.walls.append(
-                LineSeg2D(wall_points[idx], wall_points[idx + 1]))
+        if isinstance(wall_points, Walls):
+            self.walls = wall_points
+        else:
+            self.walls = Walls(wall_points)
 
     def move(self, wheel_angle):
         """Make the car move to mext position according to the current wheel
@@ -69,22 +71,10 @@ class Car(object):
         else:
             degree = (self.angle - 45) % 360
 
-        radar = Line2D(self.pos, (self.pos[0] + math.cos(math.radians(degree)),
-                                  self.pos[1] + math.sin(math.radians(degree))))
-        intersections = []
-        for wall in self.walls:
-            inter = wall.intersection(radar)
-            if inter is not None:
-                if (0 < degree < 180 and inter[1] > self.pos[1]
-                        or 180 < degree < 360 and inter[1] < self.pos[1]
-                        or (90 > degree >= 0 or 360 > degree > 270) and inter[0] > self.pos[0]
-                        or 90 < degree < 270 and inter[0] < self.pos[0]):
-                    intersections.append(inter)
-
-        if not intersections:
+        inter, distance = self.walls.cast(self.pos, degree)
+        if inter is None:
             return (None, '--')
-        return (min(intersections, key=lambda item: dist(self.pos, item)),
-                min(dist(self.pos, i) for i in intersections))
+        return (inter, distance)
 
     @property
     def is_collided(self):
@@ -94,12 +84,15 @@ class Car(object):
             boolean: if the car is collided.
         """
 
-        for wall in self.walls:
-            if wall.point_dist(self.pos) <= self.radius:
-                return True
-        return False
+        return self.collided_wall is not None
+
+    @property
+    def collided_wall(self):
+        """Get the wall which the car is collided against.
 
+        Returns:
+            int: the index of the collided wall in `self.walls`, or None if
+            the car is not collided.
+        """
 
-def dist(pt0, pt1):
-    """Return the distance between pt0 and pt1."""
-    return math.sqrt(sum(map(lambda a, b: (a - b)**2, pt0, pt1)))
+        return self.walls.collided(self.pos, self.radius)
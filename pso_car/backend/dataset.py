@@ -0,0 +1,71 @@
+"""
+Define the storage of training datasets.
+Note: A dataset is one float array in shape (n_samples, dim + 1). The last
+      column is the expected output and the others are the input.
+"""
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def as_array(dataset):
+    """Convert the dataset into one float array.
+
+    Args:
+        dataset (numpy.ndarray or list): The array in shape
+            (n_samples, dim + 1) or a list of (input, output) pairs.
+
+    Returns:
+        numpy.ndarray: The dataset in shape (n_samples, dim + 1).
+    """
+
+    if isinstance(dataset, np.ndarray):
+        return np.atleast_2d(dataset.astype(float, copy=False))
+    return np.array([tuple(i) + (o,) for i, o in dataset], dtype=float)
+
+
+class SharedArray(object):
+
+    def __init__(self, array):
+        """Copy a float array into shared memory. The instance is pickled by
+        the name of the shared memory block, so every process unpickling it
+        reads the same buffer without copying.
+
+        Args:
+            array (numpy.ndarray): The array to publish.
+        """
+
+        array = np.ascontiguousarray(array, dtype=float)
+        self.__shm = shared_memory.SharedMemory(create=True,
+                                                size=max(array.nbytes, 1))
+        self.__is_owner = True
+        self.shape = array.shape
+        self.array = np.ndarray(self.shape, dtype=float,
+                                buffer=self.__shm.buf)
+        self.array[:] = array
+
+    def __getstate__(self):
+        return {'name': self.__shm.name, 'shape': self.shape}
+
+    def __setstate__(self, state):
+        self.__shm = shared_memory.SharedMemory(name=state['name'])
+        self.__is_owner = False
+        self.shape = state['shape']
+        self.array = np.ndarray(self.shape, dtype=float,
+                                buffer=self.__shm.buf)
+
+    @property
+    def name(self):
+        return self.__shm.name
+
+    def close(self):
+        """Detach from the shared memory, and free it if this instance is the
+        creator."""
+        if self.__shm is None:
+            return
+        self.array = None
+        self.__shm.close()
+        if self.__is_owner:
+            self.__shm.unlink()
+        self.__shm = None
@@ -0,0 +1,462 @@
+"""
+Define the headless PSO engine which trains the RBFN parameters without Qt.
+The progress is reported by iterating `PSOEngine.iterate()` or by the callback
+given to `PSOEngine.run()`.
+"""
+
+import collections
+import os
+import queue
+import time
+
+import numpy as np
+
+from .fitness import DatasetFitness
+from .swarm import Swarm
+from .workers import FitnessPool
+
+# bump this if the content of the checkpoint files changes
+CHECKPOINT_VERSION = 2
+
+Progress = collections.namedtuple(
+    'Progress', ['iteration', 'errs', 'global_best_err', 'total_best_err'])
+
+
+def summarize_errors(errs, percentiles=(0, 25, 50, 75, 100), bins=20):
+    """Summarize the errors of a swarm for reporting.
+
+    Arguments:
+        errs {numpy.ndarray} -- The errors of every particle.
+
+    Keyword Arguments:
+        percentiles {tuple of floats} -- The percentiles to report.
+            (default: {(0, 25, 50, 75, 100)})
+        bins {int} -- The number of bins of the histogram. (default: {20})
+
+    Returns:
+        dict -- The statistics of the finite errors in plain Python types:
+            `mean`, `std`, `min`, `max`, `percentiles` (list of
+            (percentile, value)) and `histogram` ((counts, bin edges)).
+    """
+
+    errs = np.asarray(errs, dtype=float)
+    errs = errs[np.isfinite(errs)]
+    if not len(errs):
+        errs = np.array([np.nan])
+    counts, edges = np.histogram(errs[~np.isnan(errs)], bins)
+    return {
+        'mean': float(errs.mean()),
+        'std': float(errs.std()),
+        'min': float(errs.min()),
+        'max': float(errs.max()),
+        'percentiles': [(p, float(v)) for p, v in
+                        zip(percentiles, np.percentile(errs, percentiles))],
+        'histogram': (counts.tolist(), edges.tolist())
+    }
+
+
+class EarlyStopping(object):
+
+    def __init__(self, target_err=None, window=None, tol=0.0,
+                 min_diversity=None, time_budget=None):
+        """The criteria of stopping the PSO before the last iteration. Every
+        criterion is disabled if None.
+
+        Keyword Arguments:
+            target_err {float} -- Stop when the total best error is not larger
+                than it. (default: {None})
+            window {int} -- Stop when the total best error has not improved
+                by more than `tol` in this many iterations. (default: {None})
+            tol {float} -- The least improvement of the total best error in
+                `window` iterations. (default: {0.0})
+            min_diversity {float} -- Stop when the diversity of the swarm,
+                e.g. `Swarm.diversity()`, falls below it. (default: {None})
+            time_budget {float} -- Stop when the iterating has run for this
+                many seconds. (default: {None})
+        """
+
+        self.target_err = target_err
+        self.window = window
+        self.tol = tol
+        self.min_diversity = min_diversity
+        self.time_budget = time_budget
+        self.start()
+
+    def start(self):
+        """Reset the stagnation history and the clock."""
+        self.__start = time.monotonic()
+        self.__bests = collections.deque(maxlen=(self.window or 0) + 1)
+
+    def check(self, progress, diversity):
+        """Check the criteria after evaluating an iteration.
+
+        Arguments:
+            progress {Progress} -- The errors of the iteration.
+            diversity {callable} -- Get the diversity of the evaluated swarm,
+                e.g. `Swarm.diversity`. Only called if `min_diversity` is set.
+
+        Returns:
+            str -- The reason of stopping, or None to continue.
+        """
+
+        if self.target_err is not None and \
+                progress.total_best_err <= self.target_err:
+            return 'The total best error {:.5f} has reached the target ' \
+                '{:.5f}.'.format(progress.total_best_err, self.target_err)
+
+        if self.window:
+            self.__bests.append(progress.total_best_err)
+            if len(self.__bests) == self.__bests.maxlen and \
+                    self.__bests[0] - self.__bests[-1] <= self.tol:
+                return 'The total best error has not improved by more than ' \
+                    '{} in {} iterations.'.format(self.tol, self.window)
+
+        if self.min_diversity is not None:
+            diversity = diversity()
+            if diversity < self.min_diversity:
+                return 'The swarm diversity {:.5f} has collapsed below ' \
+                    '{}.'.format(diversity, self.min_diversity)
+
+        if self.time_budget is not None and \
+                time.monotonic() - self.__start >= self.time_budget:
+            return 'The time budget of {} seconds has run out.'.format(
+                self.time_budget)
+        return None
+
+
+class PSOEngine(object):
+
+    def __init__(self, iter_times, population_size, inertia_weight,
+                 cognitive_const_upper, social_const_upper, v_max, nneuron,
+                 dataset, sd_max=1, is_multicore=True, fitness=None,
+                 checkpoint=None, checkpoint_every=100, early_stopping=None,
+                 is_async=False, async_batch=None):
+        """The PSO training the parameters of a RBFN.
+
+        Arguments:
+            iter_times {int} -- The total iterating times.
+            population_size {int} -- The number of particles.
+            inertia_weight {float} -- The inertia weight of the velocity.
+            cognitive_const_upper {float} -- The random upper bound for
+                cognitive accelerate constant.
+            social_const_upper {float} -- The random upper bound for social
+                accelerate constant.
+            v_max {float} -- The maximum of velocity.
+            nneuron {int} -- Number of neuron in RBFN without the threshold.
+            dataset {numpy.ndarray} -- The training data in shape
+                (n_samples, dim + 1) whose last column is the expected output.
+
+        Keyword Arguments:
+            sd_max {int} -- The upper bound of standard deviation for each
+                neuron in RBFN while initializing. (default: {1})
+            is_multicore {bool} -- If the fitting function is evaluated by a
+                pool of worker processes. (default: {True})
+            fitness {object} -- The fitting function, e.g.
+                `SimulationFitness`. Its `fingerprint` identifies it in the
+                checkpoints. Use `DatasetFitness` on `dataset` if None.
+                (default: {None})
+            checkpoint {str} -- The path of the checkpoint file written every
+                `checkpoint_every` iterations and when the iterating ends.
+                Do not checkpoint if None. (default: {None})
+            checkpoint_every {int} -- The number of iterations between two
+                checkpoints. (default: {100})
+            early_stopping {EarlyStopping} -- The criteria of stopping before
+                the last iteration. (default: {None})
+            is_async {bool} -- If the particles are evaluated and moved without
+                waiting for each other. See `iterate_async`.
+                (default: {False})
+            async_batch {int} -- The number of particles in each task of the
+                asynchronous mode. Use a quarter of the share of each worker
+                if None. (default: {None})
+        """
+
+        self.abort = False
+        self.iter_times = iter_times
+        self.population_size = population_size
+        self.inertia_weight = inertia_weight
+        self.cognitive_const_upper = cognitive_const_upper
+        self.social_const_upper = social_const_upper
+        self.nneuron = nneuron
+        self.is_multicore = is_multicore
+        self.checkpoint = checkpoint
+        self.checkpoint_every = checkpoint_every
+        self.early_stopping = early_stopping
+        self.is_async = is_async
+        self.async_batch = async_batch
+        # the reason of the early stopping of the last iterating
+        self.stop_reason = None
+        # the index of the next iteration
+        self.iteration = 0
+
+        if fitness is None:
+            fitness = DatasetFitness(dataset, nneuron)
+        self.fitness = fitness
+        self.swarm = Swarm(population_size, nneuron, self.fitness.data_dim,
+                           self.fitness.mean_range, v_max, sd_max)
+        self.total_best_err = float('inf')
+        self.total_best_position = self.swarm.positions[0].copy()
+        self.__pool = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def open(self):
+        """Start the worker pool if the engine is multicore."""
+        if self.is_multicore and self.__pool is None:
+            self.fitness.share()
+            self.__pool = FitnessPool(self.fitness)
+
+    def close(self):
+        """Shut down the worker pool and free the shared dataset."""
+        if self.__pool is not None:
+            self.__pool.close()
+            self.__pool = None
+        self.fitness.release()
+
+    def stop(self):
+        """Stop the iterating before the next iteration."""
+        self.abort = True
+
+    def run(self, callback=None):
+        """Train till the end of iterating and return the best position.
+
+        Keyword Arguments:
+            callback {callable} -- Called with a `Progress` after every
+                iteration and after the final selection. (default: {None})
+
+        Returns:
+            tuple -- (the best position, its error).
+        """
+
+        with self:
+            for progress in self.iterate():
+                if callback is not None:
+                    callback(progress)
+            progress = self.finalize()
+            if callback is not None:
+                callback(progress)
+        return self.total_best_position, self.total_best_err
+
+    def iterate(self):
+        """Evaluate and move the swarm once per iteration.
+
+        Yields:
+            Progress -- The errors after evaluating each iteration.
+        """
+
+        if self.is_async:
+            yield from self.iterate_async()
+            return
+
+        self.stop_reason = None
+        if self.early_stopping is not None:
+            self.early_stopping.start()
+        for i in range(self.iteration, self.iter_times):
+            if self.abort:
+                break
+
+            # get the best particle in current iteration
+            progress = self.__evaluate(i)
+            global_best_position = self.swarm.positions[
+                int(self.swarm.errs.argmin())].copy()
+            if self.early_stopping is not None:
+                self.stop_reason = self.early_stopping.check(
+                    progress, self.swarm.diversity)
+            yield progress
+            if self.stop_reason is not None:
+                break
+
+            # update the position and velocity for every particle
+            self.swarm.update_positions(self.inertia_weight,
+                                        self.cognitive_const_upper,
+                                        self.social_const_upper,
+                                        global_best_position)
+            self.iteration = i + 1
+            if self.checkpoint is not None and \
+                    self.iteration % self.checkpoint_every == 0:
+                self.save_checkpoint(self.checkpoint)
+
+        if self.checkpoint is not None:
+            self.save_checkpoint(self.checkpoint)
+
+    def iterate_async(self):
+        """Evaluate and move the particles without the barrier between the
+        iterations. The swarm is split into tasks of `async_batch` particles.
+        As soon as a task returns, its particles update their personal bests
+        and the total best, move toward the total best and go straight back
+        to the workers. Every `population_size` evaluations count as an
+        iteration. Without a worker pool, the tasks run one by one.
+
+        Yields:
+            Progress -- The latest errors of every particle after each
+                iteration.
+        """
+
+        self.stop_reason = None
+        if self.early_stopping is not None:
+            self.early_stopping.start()
+        nworker = self.__pool.processes if self.__pool is not None else 1
+        batch = self.async_batch or max(
+            self.population_size // (4 * nworker), 1)
+        tasks = np.array_split(np.arange(self.population_size),
+                               max(self.population_size // batch, 1))
+        results = queue.Queue()
+        for indices in tasks:
+            self.__submit(indices, results)
+
+        pending = len(tasks)
+        evaluated = 0
+        stopping = self.abort or self.iteration >= self.iter_times
+        while pending:
+            indices, errs = results.get()
+            pending -= 1
+            if isinstance(errs, Exception):
+                raise errs
+
+            self.swarm.update_errs(errs, indices)
+            best = indices[int(np.argmin(errs))]
+            if self.swarm.errs[best] < self.total_best_err:
+                self.total_best_err = float(self.swarm.errs[best])
+                self.total_best_position = self.swarm.positions[best].copy()
+
+            evaluated += len(indices)
+            if evaluated >= self.population_size and not stopping:
+                evaluated -= self.population_size
+                # the tasks in flight keep updating the errors of the swarm
+                progress = Progress(self.iteration, self.swarm.errs.copy(),
+                                    float(self.swarm.errs.min()),
+                                    self.total_best_err)
+                if self.early_stopping is not None:
+                    self.stop_reason = self.early_stopping.check(
+                        progress, self.swarm.diversity)
+                yield progress
+                if self.stop_reason is None:
+                    # the stopped iteration is not finished, the same as
+                    # `iterate`
+                    self.iteration += 1
+                if self.checkpoint is not None and \
+                        self.iteration % self.checkpoint_every == 0:
+                    self.save_checkpoint(self.checkpoint)
+                stopping = self.abort or self.stop_reason is not None or \
+                    self.iteration >= self.iter_times
+            if stopping:
+                # wait for the tasks still running without moving them
+                continue
+
+            self.swarm.update_positions(self.inertia_weight,
+                                        self.cognitive_const_upper,
+                                        self.social_const_upper,
+                                        self.total_best_position, indices)
+            self.__submit(indices, results)
+            pending += 1
+
+        if self.checkpoint is not None:
+            self.save_checkpoint(self.checkpoint)
+
+    def __submit(self, indices, results):
+        positions = self.swarm.positions[indices]
+        if self.__pool is not None:
+            self.__pool.submit(indices, positions, results)
+        else:
+            results.put((indices, self.fitness.errors(positions)))
+
+    def immigrate(self, positions, errs):
+        """Replace the worst particles by the immigrants from other swarms
+        between two iterations. See `Swarm.immigrate`."""
+        self.swarm.immigrate(positions, errs)
+        best = int(np.argmin(errs))
+        if errs[best] < self.total_best_err:
+            self.total_best_err = float(errs[best])
+            self.total_best_position = np.array(positions[best])
+
+    @property
+    def hyperparameters(self):
+        """The hyperparameters of moving the swarm, which are restored by
+        `load_checkpoint`."""
+        return collections.OrderedDict((
+            ('inertia weight', self.inertia_weight),
+            ('cognitive const upper', self.cognitive_const_upper),
+            ('social const upper', self.social_const_upper),
+            ('maximum of velocity', self.swarm.v_max)))
+
+    def save_checkpoint(self, filepath):
+        """Save the whole state of the PSO between two iterations. The file is
+        replaced at once, so an interrupted saving keeps the last checkpoint.
+
+        Arguments:
+            filepath {str} -- The path of the checkpoint file.
+        """
+
+        tmp_path = '{}.tmp'.format(filepath)
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, version=CHECKPOINT_VERSION,
+                     iteration=self.iteration,
+                     nneuron=self.nneuron,
+                     fitness=self.fitness.fingerprint,
+                     inertia_weight=self.inertia_weight,
+                     cognitive_const_upper=self.cognitive_const_upper,
+                     social_const_upper=self.social_const_upper,
+                     v_max=self.swarm.v_max,
+                     total_best_err=self.total_best_err,
+                     total_best_position=self.total_best_position,
+                     **self.swarm.get_state())
+        os.replace(tmp_path, filepath)
+
+    def load_checkpoint(self, filepath):
+        """Restore the state saved by `save_checkpoint`, so the iterating
+        continues identically. The hyperparameters of moving the swarm are
+        restored, while `iter_times` is kept to allow extending a run. The
+        fitting function must be the same as the saved one.
+
+        Arguments:
+            filepath {str} -- The path of the checkpoint file.
+        """
+
+        with np.load(filepath) as data:
+            if int(data['version']) != CHECKPOINT_VERSION:
+                raise ValueError('The checkpoint version does not match.')
+            if int(data['nneuron']) != self.nneuron:
+                raise ValueError(
+                    'The number of neuron {} of the checkpoint does not '
+                    'match {}.'.format(int(data['nneuron']), self.nneuron))
+            if str(data['fitness']) != self.fitness.fingerprint:
+                # the errors of the swarm are of another objective
+                raise ValueError('The checkpoint was trained on another '
+                                 'dataset, maps or fitting function.')
+            self.swarm.set_state(data)
+            self.iteration = int(data['iteration'])
+            self.inertia_weight = float(data['inertia_weight'])
+            self.cognitive_const_upper = float(data['cognitive_const_upper'])
+            self.social_const_upper = float(data['social_const_upper'])
+            self.swarm.v_max = float(data['v_max'])
+            self.total_best_err = float(data['total_best_err'])
+            self.total_best_position = np.array(data['total_best_position'])
+
+    def finalize(self):
+        """Evaluate the last positions of the swarm and select the best one.
+
+        Returns:
+            Progress -- The errors of the final selection.
+        """
+
+        return self.__evaluate(self.iter_times)
+
+    def __evaluate(self, iteration):
+        if self.__pool is not None:
+            errs = self.__pool.errors(self.swarm.positions)
+        else:
+            errs = self.fitness.errors(self.swarm.positions)
+        global_best = self.swarm.update_errs(errs)
+
+        # save the best particle in whole training
+        if self.swarm.errs[global_best] < self.total_best_err:
+            self.total_best_err = float(self.swarm.errs[global_best])
+            self.total_best_position = \
+                self.swarm.positions[global_best].copy()
+        return Progress(iteration, self.swarm.errs,
+                        float(self.swarm.errs[global_best]),
+                        self.total_best_err)
@@ -0,0 +1,90 @@
+"""
+Define the headless episode runner which drives a car by a controller as fast
+as possible and returns the whole trajectory as a structured array.
+"""
+
+import enum
+
+import numpy as np
+
+TRAJECTORY_DTYPE = np.dtype([
+    ('x', float), ('y', float), ('angle', float),
+    ('front_dist', float), ('right_dist', float), ('left_dist', float),
+    ('front_pt', float, (2,)), ('right_pt', float, (2,)),
+    ('left_pt', float, (2,)),
+    ('wheel_angle', float)
+])
+
+
+class Outcome(enum.Enum):
+    ARRIVED = 'arrived'
+    COLLIDED = 'collided'
+    STEP_LIMIT = 'step limit reached'
+    LOST = 'radar lost'  # any radar detects no wall
+    ABORTED = 'aborted'
+
+
+def is_arrived(pos, ending_area):
+    """Check if the position is in the ending area ((left, top),
+    (right, bottom))."""
+    ending_lt, ending_rb = ending_area
+    return (ending_lt[0] <= pos[0] <= ending_rb[0]
+            and ending_lt[1] >= pos[1] >= ending_rb[1])
+
+
+def run_episode(car, controller, ending_area, max_steps=10000,
+                should_stop=None):
+    """Drive the car till it arrives at the ending area, collides, runs out
+    of steps, or is stopped.
+
+    Args:
+        car (Car): The car to drive. It is moved in place.
+        controller (callable): Get the wheel angle from the tuple of
+            (front, right, left) distances, e.g.
+            `functools.partial(rbfn.output, antinorm=True)`.
+        ending_area (tuple): ((left, top), (right, bottom)) of the ending
+            area.
+        max_steps (int, optional): Defaults to 10000. The maximum of moves.
+        should_stop (callable, optional): Defaults to None. Checked before
+            every move. If it returns True, the episode ends as
+            `Outcome.ABORTED`.
+
+    Returns:
+        tuple: (trajectory, outcome). The trajectory is an array of
+        `TRAJECTORY_DTYPE` holding the state sensed on every step including
+        the last one, whose wheel angle is NaN since the car does not move
+        any more. The missing distances and intersections are NaN as well.
+    """
+
+    trajectory = np.full(max_steps + 1, np.nan, dtype=TRAJECTORY_DTYPE)
+    outcome = Outcome.STEP_LIMIT
+    for step in range(max_steps + 1):
+        state = trajectory[step]
+        state['x'], state['y'] = car.pos
+        state['angle'] = car.angle
+        dists = []
+        for direction in ('front', 'right', 'left'):
+            inter, dist = car.dist(direction)
+            if inter is not None:
+                state[direction + '_pt'] = inter
+                state[direction + '_dist'] = dist
+            dists.append(dist)
+
+        if is_arrived(car.pos, ending_area):
+            outcome = Outcome.ARRIVED
+            break
+        if car.is_collided:
+            outcome = Outcome.COLLIDED
+            break
+        if '--' in dists:
+            outcome = Outcome.LOST
+            break
+        if step == max_steps:
+            break
+        if should_stop is not None and should_stop():
+            outcome = Outcome.ABORTED
+            break
+
+        state['wheel_angle'] = controller(tuple(dists))
+        car.move(state['wheel_angle'])
+    return trajectory[:step + 1], outcome
@@ -0,0 +1,253 @@
+"""
+Define the fitting functions which score a whole swarm at once.
+Note: The parameters of every particle follow the layout documented in
+      `RBFN.load_model`.
+"""
+
+import hashlib
+
+import numpy as np
+
+from .dataset import SharedArray, as_array
+
+
+def unpack_params(params, nneuron):
+    """Unpack the parameter vectors of many RBFNs into arrays.
+
+    Args:
+        params (numpy.ndarray): The parameters in shape (nparticle, ndim).
+        nneuron (int): Number of neuron in RBFN without the threshold.
+
+    Returns:
+        tuple: (weights, means, sds) in shape (nparticle, nneuron + 1),
+        (nparticle, nneuron, dim) and (nparticle, nneuron) respectively. The
+        first column of weights is the synaptic weight of the threshold.
+    """
+
+    params = np.atleast_2d(np.asarray(params, dtype=float))
+    weights = params[:, :nneuron + 1]
+    means = params[:, nneuron + 1:-nneuron]
+    sds = params[:, -nneuron:]
+    return (weights, means.reshape(len(params), nneuron, -1), sds)
+
+
+def mask_neurons(weights, sds):
+    """Get the synaptic weights and the exponent factors -1 / (2 * SD^2) of
+    the gaussian neurons. The neuron with non-positive SD outputs 0 as
+    `Neuron`, so both of them are 0 for it.
+
+    Args:
+        weights (numpy.ndarray): The synaptic weights without the threshold.
+        sds (numpy.ndarray): The standard deviations in the same shape.
+
+    Returns:
+        tuple: (weights, factors) in the same shape as `sds`.
+    """
+
+    sds = np.asarray(sds, dtype=float)
+    valid = sds > 0
+    with np.errstate(divide='ignore'):
+        factors = np.where(valid, -1 / (2 * sds**2), 0)
+    return np.where(valid, weights, 0), factors
+
+
+def unpack_gaussians(params, nneuron):
+    """Unpack the parameter vectors of many RBFNs ready for the forward
+    pass.
+
+    Args:
+        params (numpy.ndarray): The parameters in shape (nparticle, ndim).
+        nneuron (int): Number of neuron in RBFN without the threshold.
+
+    Returns:
+        tuple: (thresholds, weights, means, factors) in shape (nparticle,),
+        (nparticle, nneuron), (nparticle, nneuron, dim) and
+        (nparticle, nneuron). See `mask_neurons` for weights and factors.
+    """
+
+    weights, means, sds = unpack_params(params, nneuron)
+    masked_weights, factors = mask_neurons(weights[:, 1:], sds)
+    return weights[:, 0], masked_weights, means, factors
+
+
+def gaussian_output(sq_dists, thresholds, weights, factors):
+    """Sum the weighted gaussian activations of the neurons and the
+    thresholds. This is the forward pass shared by every RBFN predictor.
+
+    Args:
+        sq_dists (numpy.ndarray): The squared distances between the inputs
+            and the means, whose last axis is of the neurons. It is
+            overwritten by the activations.
+        thresholds (numpy.ndarray): The synaptic weights of the thresholds,
+            broadcastable to `sq_dists` without the last axis.
+        weights (numpy.ndarray): The synaptic weights of the neurons,
+            broadcastable to `sq_dists`. See `mask_neurons`.
+        factors (numpy.ndarray): The exponent factors of the neurons,
+            broadcastable to `sq_dists`. See `mask_neurons`.
+
+    Returns:
+        numpy.ndarray: The outputs in the shape of `sq_dists` without the
+        last axis.
+    """
+
+    sq_dists *= factors
+    np.exp(sq_dists, out=sq_dists)
+    return np.einsum('...n,...n->...', sq_dists, weights) + thresholds
+
+
+def antinormalize(res, output_scale=40):
+    """Scale the outputs to the wheel angles and clip them."""
+    return np.clip(res * output_scale, -output_scale, output_scale)
+
+
+def batch_output(params, nneuron, data, antinorm=False):
+    """Get the outputs of many RBFNs on every row of the data in one
+    broadcast over (particles x neurons x samples).
+
+    Args:
+        params (numpy.ndarray): The parameters in shape (nparticle, ndim).
+        nneuron (int): Number of neuron in RBFN without the threshold.
+        data (numpy.ndarray): The input data in shape (n_samples, dim).
+        antinorm (bool, optional): Defaults to False. If the outputs should be
+            antinormalized.
+
+    Returns:
+        numpy.ndarray: The outputs in shape (nparticle, n_samples).
+    """
+
+    thresholds, weights, means, factors = unpack_gaussians(params, nneuron)
+    data = np.atleast_2d(np.asarray(data, dtype=float))
+
+    # squared distances between every mean and every sample, laid out with
+    # the samples innermost for the speed of the elementwise operations
+    sq_dists = np.zeros((len(means), nneuron, len(data)))
+    for dim in range(data.shape[1]):
+        sq_dists += (data[:, dim] - means[:, :, dim, np.newaxis])**2
+
+    res = gaussian_output(sq_dists.transpose(0, 2, 1),
+                          thresholds[:, np.newaxis],
+                          weights[:, np.newaxis], factors[:, np.newaxis])
+    if antinorm:
+        return antinormalize(res)
+    return res
+
+
+def paired_output(params, nneuron, data, antinorm=False):
+    """Get the output of every RBFN on its own row of the data.
+
+    Args:
+        params (numpy.ndarray): The parameters in shape (n, ndim).
+        nneuron (int): Number of neuron in RBFN without the threshold.
+        data (numpy.ndarray): The input data in shape (n, dim).
+        antinorm (bool, optional): Defaults to False. If the outputs should be
+            antinormalized.
+
+    Returns:
+        numpy.ndarray: The outputs in shape (n,).
+    """
+
+    thresholds, weights, means, factors = unpack_gaussians(params, nneuron)
+    data = np.atleast_2d(np.asarray(data, dtype=float))
+    sq_dists = ((data[:, np.newaxis, :] - means)**2).sum(axis=2)
+    res = gaussian_output(sq_dists, thresholds, weights, factors)
+    if antinorm:
+        return antinormalize(res)
+    return res
+
+
+class DatasetFitness(object):
+
+    def __init__(self, dataset, nneuron, max_memory=2**27, chunk_size=None):
+        """The fitting function of the mean absolute error against a training
+        dataset.
+
+        Arguments:
+            dataset {numpy.ndarray} -- The training data in shape
+                (n_samples, dim + 1) whose last column is the expected output.
+            nneuron {int} -- Number of neuron in RBFN without the threshold.
+
+        Keyword Arguments:
+            max_memory {int} -- The upper bound in bytes of the intermediate
+                tensor while scoring a chunk of particles. (default: {2**27})
+            chunk_size {int} -- The number of particles scored in one
+                broadcast. Overrides `max_memory` if given. (default: {None})
+        """
+
+        self.__set_data(as_array(dataset))
+        self.nneuron = nneuron
+        self.__shared = None
+        digest = hashlib.sha1(b'dataset')
+        digest.update(np.array(self.data.shape).tobytes())
+        digest.update(np.ascontiguousarray(self.data, dtype=float).tobytes())
+        # the identity of the objective for the checkpoints
+        self.fingerprint = digest.hexdigest()
+        if chunk_size is None:
+            # the tensor of a particle and its temporaries while scoring
+            particle_bytes = 3 * nneuron * len(self.data) * \
+                self.data.itemsize
+            chunk_size = max_memory // max(particle_bytes, 1)
+        self.chunk_size = max(int(chunk_size), 1)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self.__shared is not None:
+            # the workers attach to the shared buffer instead of copying it
+            for key in ('data', 'inputs', 'outputs'):
+                del state[key]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.__shared is not None:
+            self.__set_data(self.__shared.array)
+
+    def __set_data(self, data):
+        self.data = data
+        self.inputs = data[:, :-1]
+        self.outputs = data[:, -1]
+
+    def share(self):
+        """Move the dataset into shared memory, so that pickling this instance
+        to other processes does not copy the dataset."""
+        if self.__shared is None:
+            self.__shared = SharedArray(self.data)
+            self.__set_data(self.__shared.array)
+
+    def release(self):
+        """Move the dataset back from shared memory and free the memory."""
+        if self.__shared is not None:
+            self.__set_data(self.data.copy())
+            self.__shared.close()
+            self.__shared = None
+
+    @property
+    def mean_range(self):
+        """The (min, max) of the input data."""
+        return (float(self.inputs.min()), float(self.inputs.max()))
+
+    @property
+    def data_dim(self):
+        return self.inputs.shape[1]
+
+    def errors(self, positions):
+        """Get the mean absolute error of every position.
+
+        Arguments:
+            positions {numpy.ndarray} -- The parameters in shape
+                (nparticle, ndim).
+
+        Returns:
+            numpy.ndarray -- The errors in shape (nparticle,).
+        """
+
+        positions = np.atleast_2d(positions)
+        errs = np.empty(len(positions))
+        for start in range(0, len(positions), self.chunk_size):
+            stop = start + self.chunk_size
+            res = batch_output(positions[start:stop], self.nneuron,
+                               self.inputs, antinorm=True)
+            errs[start:stop] = np.abs(self.outputs - res).mean(axis=1)
+        return errs
+
+    def __call__(self, positions):
+        return self.errors(positions)
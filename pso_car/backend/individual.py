@@ -7,6 +7,7 @@ Note: The initialization for each individual is especially designed for RBFN
 import math
 import numpy as np
 
+from .dataset import as_array
 from .rbfn import RBFN
 
 
@@ -16,8 +17,8 @@ class Individual(object):
         """Define an individual in swarm.
 
         Arguments:
-            dataset {list of TrainingData} -- The training data defined in
-                main.py.
+            dataset {numpy.ndarray} -- The training data in shape
+                (n_samples, dim + 1) whose last column is the expected output.
             nneuron {int} -- Number of neuron in RBFN without the threshold.
             v_max {float} -- The maximum of velocity.
 
@@ -26,12 +27,13 @@ class Individual(object):
                 neuron in RBFN. (default: {1})
         """
 
-        self.dataset = dataset
+        self.dataset = as_array(dataset)
         self.nneuron = nneuron
         self.sd_max = sd_max
-        self.mean_range = (min(min(d.i) for d in self.dataset),
-                           max(max(d.i) for d in self.dataset))
-        data_dim = len(self.dataset[0].i)
+        self.inputs = self.dataset[:, :-1]
+        self.outputs = self.dataset[:, -1]
+        self.mean_range = (float(self.inputs.min()), float(self.inputs.max()))
+        data_dim = self.inputs.shape[1]
 
         self.position = np.random.uniform(-1, 1, nneuron + 1)
         self.position = np.append(self.position, np.random.uniform(
@@ -68,9 +70,7 @@ class Individual(object):
 
         rbfn = RBFN(self.nneuron, self.mean_range, self.sd_max)
         rbfn.load_model(self.position)
-        res = sum(abs(d.o - rbfn.output(d.i, antinorm=True))
-                  for d in self.dataset)
-        self.err = res / len(self.dataset)
+        _, self.err = rbfn.evaluate(self.inputs, self.outputs)
         self.__fitness = 1 / self.err
         self.__update_best()
 
@@ -0,0 +1,325 @@
+"""
+Define the island model which runs independent sub-swarms in separate
+processes. Every `migration_interval` iterations, the islands send their best
+particles to the coordinator, which routes them to other islands by the
+migration topology, where they replace the worst particles.
+"""
+
+import multiprocessing as mp
+import queue
+import traceback
+
+import numpy as np
+
+from .engine import PSOEngine, Progress
+from .fitness import DatasetFitness
+
+TOPOLOGIES = ('ring', 'fully_connected', 'random')
+
+# the seconds between two checks of stopping while waiting for messages
+_POLL_INTERVAL = 0.1
+
+
+def route_migrants(migrants, topology, random_state=None):
+    """Decide the immigrants of every island.
+
+    Arguments:
+        migrants {dict} -- The (positions, errors) of the emigrants of every
+            island, keyed by the island index.
+        topology {str} -- One of `TOPOLOGIES`. `ring` sends to the next
+            island, `fully_connected` sends the best emigrants of all the
+            other islands, and `random` sends to a random other island.
+
+    Keyword Arguments:
+        random_state {numpy.random.RandomState} -- The random generator of
+            the random topology. (default: {None})
+
+    Returns:
+        dict -- The (positions, errors) of the immigrants of every island.
+    """
+
+    islands = sorted(migrants)
+    if len(islands) < 2:
+        return {}
+    if topology == 'ring':
+        return {dst: migrants[src] for src, dst in
+                zip(islands, islands[1:] + islands[:1])}
+    if topology == 'fully_connected':
+        routes = {}
+        for dst in islands:
+            positions = np.concatenate([migrants[src][0] for src in islands
+                                        if src != dst])
+            errs = np.concatenate([migrants[src][1] for src in islands
+                                   if src != dst])
+            best = np.argsort(errs, kind='stable')[:len(migrants[dst][1])]
+            routes[dst] = (positions[best], errs[best])
+        return routes
+    if topology == 'random':
+        if random_state is None:
+            random_state = np.random.RandomState()
+        routes = {}
+        for dst in islands:
+            others = [src for src in islands if src != dst]
+            routes[dst] = migrants[others[random_state.randint(len(others))]]
+        return routes
+    raise ValueError('Unknown migration topology: {}'.format(topology))
+
+
+def _run_island(idx, engine_args, fitness, migration_interval, migration_size,
+                inbox, outbox, stop_event):
+    """ This function is the target of the island processes. """
+    try:
+        engine = PSOEngine(*engine_args, is_multicore=False, fitness=fitness)
+        for progress in engine.iterate():
+            outbox.put(('progress', idx, progress.iteration,
+                        progress.errs.copy(), progress.global_best_err,
+                        engine.total_best_err, engine.total_best_position,
+                        engine.swarm.diversity()))
+            if stop_event.is_set():
+                engine.stop()
+                continue
+            iteration = progress.iteration + 1
+            if not migration_interval or iteration % migration_interval or \
+                    iteration >= engine.iter_times:
+                continue
+
+            outbox.put(('migrate', idx, iteration) +
+                       engine.swarm.emigrants(migration_size))
+            while not stop_event.is_set():
+                try:
+                    immigrants = inbox.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+                if immigrants is not None:
+                    engine.immigrate(*immigrants)
+                break
+        outbox.put(('finished', idx))
+        progress = engine.finalize()
+        outbox.put(('final', idx, engine.total_best_position,
+                    engine.total_best_err, progress.errs.copy()))
+    except Exception:
+        outbox.put(('error', idx, traceback.format_exc()))
+
+
+class IslandEngine(object):
+
+    def __init__(self, nisland, iter_times, population_size, inertia_weight,
+                 cognitive_const_upper, social_const_upper, v_max, nneuron,
+                 dataset, sd_max=1, fitness=None, migration_interval=10,
+                 migration_size=1, topology='ring', early_stopping=None):
+        """The PSO of `nisland` sub-swarms in separate processes, with the
+        same interface as `PSOEngine`.
+
+        Arguments:
+            nisland {int} -- The number of islands.
+            population_size {int} -- The number of particles of each island.
+
+            The others are the same as `PSOEngine`.
+
+        Keyword Arguments:
+            migration_interval {int} -- The number of iterations between two
+                migrations. Never migrate if 0. (default: {10})
+            migration_size {int} -- The number of emigrants of each island in
+                a migration. (default: {1})
+            topology {str} -- The migration topology in `TOPOLOGIES`.
+                (default: {'ring'})
+            early_stopping {EarlyStopping} -- The criteria of stopping every
+                island, checked on the errors of all the islands and the mean
+                diversity of them. (default: {None})
+        """
+
+        if topology not in TOPOLOGIES:
+            raise ValueError('Unknown migration topology: {}'.format(topology))
+        self.abort = False
+        self.nisland = nisland
+        self.iter_times = iter_times
+        self.population_size = population_size
+        self.nneuron = nneuron
+        self.migration_interval = migration_interval
+        self.migration_size = migration_size
+        self.topology = topology
+        self.early_stopping = early_stopping
+        # the island model does not checkpoint
+        self.checkpoint = None
+        self.iteration = 0
+        self.stop_reason = None
+
+        if fitness is None:
+            fitness = DatasetFitness(dataset, nneuron)
+        self.fitness = fitness
+        self.__engine_args = (iter_times, population_size, inertia_weight,
+                              cognitive_const_upper, social_const_upper, v_max,
+                              nneuron, None, sd_max)
+        self.total_best_err = float('inf')
+        self.total_best_position = None
+        self.__random_state = np.random.RandomState()
+        self.__processes = []
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def open(self):
+        """Start the processes of the islands."""
+        if self.__processes:
+            return
+        self.fitness.share()
+        self.__stop_event = mp.Event()
+        self.__outbox = mp.Queue()
+        self.__inboxes = [mp.Queue() for _ in range(self.nisland)]
+        self.__processes = [
+            mp.Process(target=_run_island,
+                       args=(idx, self.__engine_args, self.fitness,
+                             self.migration_interval, self.migration_size,
+                             self.__inboxes[idx], self.__outbox,
+                             self.__stop_event),
+                       daemon=True)
+            for idx in range(self.nisland)]
+        for process in self.__processes:
+            process.start()
+        self.__finished = set()
+        self.__finals = {}
+        self.__migrants = {}
+        self.__reports = {}
+
+    def close(self):
+        """Stop and join the islands and free the shared dataset."""
+        if self.__processes:
+            self.__stop_event.set()
+            for process in self.__processes:
+                process.join(1)
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+            self.__processes = []
+        self.fitness.release()
+
+    def stop(self):
+        """Stop every island before its next iteration."""
+        self.abort = True
+        if self.__processes:
+            self.__stop_event.set()
+
+    def run(self, callback=None):
+        """The same as `PSOEngine.run`."""
+        with self:
+            for progress in self.iterate():
+                if callback is not None:
+                    callback(progress)
+            progress = self.finalize()
+            if callback is not None:
+                callback(progress)
+        return self.total_best_position, self.total_best_err
+
+    def iterate(self):
+        """Route the migrations and merge the progress of the islands.
+
+        Yields:
+            Progress -- The errors of all the islands after every iteration
+                which every running island has evaluated.
+        """
+
+        self.stop_reason = None
+        if self.early_stopping is not None:
+            self.early_stopping.start()
+        while len(self.__finished) < self.nisland:
+            message = self.__receive()
+            if message[0] == 'progress':
+                _, idx, iteration, errs, global_best, total_best_err, \
+                    total_best_position, diversity = message
+                # the total bests are merged with the iteration, so the
+                # faster islands do not report ahead of the slower ones
+                self.__reports.setdefault(iteration, {})[idx] = \
+                    (errs, global_best, diversity, total_best_err,
+                     total_best_position)
+            elif message[0] == 'migrate':
+                _, idx, iteration, positions, errs = message
+                self.__migrants.setdefault(iteration, {})[idx] = \
+                    (positions, errs)
+            elif message[0] == 'finished':
+                self.__finished.add(message[1])
+            elif message[0] == 'final':
+                self.__finals[message[1]] = message[2:]
+            self.__migrate()
+
+            yield from self.__merge_reports()
+
+    def finalize(self):
+        """Wait for the final selection of every island and select the best.
+
+        Returns:
+            Progress -- The errors of the final selection of all islands.
+        """
+
+        while len(self.__finals) < self.nisland:
+            message = self.__receive()
+            if message[0] == 'final':
+                self.__finals[message[1]] = message[2:]
+        errs = np.concatenate([final[2] for final in self.__finals.values()])
+        for position, err, _ in self.__finals.values():
+            if err < self.total_best_err:
+                self.total_best_err = float(err)
+                self.total_best_position = position
+        return Progress(self.iter_times, errs, float(errs.min()),
+                        self.total_best_err)
+
+    def __receive(self):
+        while True:
+            try:
+                message = self.__outbox.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                if not any(p.is_alive() for p in self.__processes):
+                    raise RuntimeError('Every island has exited unexpectedly.')
+                continue
+            if message[0] == 'error':
+                self.stop()
+                raise RuntimeError('Island {} failed:\n{}'.format(
+                    message[1], message[2]))
+            return message
+
+    def __migrate(self):
+        """Route the migrations which every running island has joined."""
+        for iteration in sorted(self.__migrants):
+            migrants = self.__migrants[iteration]
+            running = set(range(self.nisland)) - self.__finished
+            if not running.issubset(migrants):
+                continue
+            routes = route_migrants(migrants, self.topology,
+                                    self.__random_state)
+            for idx in migrants:
+                self.__inboxes[idx].put(routes.get(idx))
+            del self.__migrants[iteration]
+
+    def __merge_reports(self):
+        """Merge the reports of the iterations which every running island has
+        evaluated, in order, and check the early stopping on them."""
+        while self.stop_reason is None and self.iteration in self.__reports:
+            reports = self.__reports[self.iteration]
+            running = set(range(self.nisland)) - self.__finished
+            if not running.issubset(reports):
+                return
+            del self.__reports[self.iteration]
+            errs = np.concatenate([r[0] for r in reports.values()])
+            self.__diversities = [r[2] for r in reports.values()]
+            best = min(reports.values(), key=lambda r: r[3])
+            if best[3] < self.total_best_err:
+                self.total_best_err = best[3]
+                self.total_best_position = best[4]
+            progress = Progress(self.iteration, errs,
+                                min(r[1] for r in reports.values()),
+                                self.total_best_err)
+            if self.early_stopping is not None:
+                self.stop_reason = self.early_stopping.check(
+                    progress, self.__mean_diversity)
+            yield progress
+            if self.stop_reason is not None:
+                # the islands finish their current iteration and stop
+                self.__stop_event.set()
+            else:
+                self.iteration += 1
+
+    def __mean_diversity(self):
+        return float(np.mean(self.__diversities))
@@ -0,0 +1,39 @@
+""" Read the maps and the training datasets from the data files. """
+
+import collections
+import pathlib
+
+import numpy as np
+
+from .mapcache import compile_map
+
+
+def read_maps(folderpath='maps', cache_dir=None):
+    """ Read every data of maps in `folderpath` folder. Return the
+    dictionary containing dataset. The walls of every map are compiled once
+    and shared through `compile_map`.
+    """
+    maps = {}
+    folderpath = pathlib.Path(folderpath)
+    for filepath in folderpath.glob("*.txt"):
+        maps[filepath.stem] = compile_map(filepath, cache_dir).to_dict()
+    return collections.OrderedDict(sorted(maps.items()))
+
+
+def read_training_dataset(filepath):
+    """ Read a training dataset file into one float array in shape
+    (n_samples, dim + 1), whose last column is the expected output.
+    """
+    return np.loadtxt(str(filepath), ndmin=2)
+
+
+def read_training_datasets(folderpath='data'):
+    """ Read every training dataset in `folderpath` folder. Return the
+    dictionary containing each dataset as one float array, whose last column
+    is the expected output.
+    """
+    dataset = {}
+    folderpath = pathlib.Path(folderpath)
+    for filepath in folderpath.glob("*.txt"):
+        dataset[filepath.stem] = read_training_dataset(filepath)
+    return collections.OrderedDict(sorted(dataset.items()))
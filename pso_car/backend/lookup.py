@@ -0,0 +1,203 @@
+"""
+Define the lookup-table controller which samples a trained model on a
+regular grid over the radar distances ahead of time. Every control step is a
+multilinear interpolation of the grid, which costs the same no matter how
+many neurons the model has.
+"""
+
+import itertools
+
+import numpy as np
+
+from .fitness import antinormalize
+
+
+class LookupTable(object):
+    def __init__(self, grid, ranges, output_scale=40):
+        """The outputs of a model sampled on a regular grid.
+
+        Args:
+            grid (numpy.ndarray): The outputs (before antinormalizing) on the
+                grid points in shape (n_1, ..., n_dim), where every n is at
+                least 2.
+            ranges (list of tuples): The (min, max) of every input dimension
+                covered by the grid. The inputs out of range are clamped.
+            output_scale (float, optional): Defaults to 40. The scale of
+                antinormalizing the outputs.
+        """
+
+        self.grid = np.ascontiguousarray(grid, dtype=float)
+        if len(ranges) != self.grid.ndim or min(self.grid.shape) < 2:
+            raise ValueError('The grid must have at least 2 points in each of '
+                             'the {} dimensions.'.format(len(ranges)))
+        self.ranges = [(float(lo), float(hi)) for lo, hi in ranges]
+        self.output_scale = float(output_scale)
+
+        self.__lower = [lo for lo, _ in self.ranges]
+        self.__upper = [hi for _, hi in self.ranges]
+        self.__last_cell = [n - 2 for n in self.grid.shape]
+        self.__scales = [(n - 1) / (hi - lo) for n, (lo, hi) in
+                         zip(self.grid.shape, self.ranges)]
+        self.__strides = [s // self.grid.itemsize for s in self.grid.strides]
+        self.__values = self.grid.ravel().tolist()
+        # the offsets of the corners of a cell in every dimension
+        self.__corners = list(itertools.product((0, 1),
+                                                repeat=self.grid.ndim))
+
+    @classmethod
+    def from_model(cls, model, resolution=33, ranges=((0, 40),) * 3,
+                   output_scale=40):
+        """Sample a model on a regular grid.
+
+        Args:
+            model (RBFN): The model with method `batch_output(data, antinorm)`.
+            resolution (int or tuple of ints, optional): Defaults to 33. The
+                number of grid points in each dimension.
+            ranges (list of tuples, optional): Defaults to (0, 40) for each of
+                the front, right and left distances. The (min, max) of every
+                input dimension.
+            output_scale (float, optional): Defaults to 40. The scale of
+                antinormalizing the outputs.
+
+        Returns:
+            LookupTable: The table of the model.
+        """
+
+        if np.isscalar(resolution):
+            resolution = (int(resolution),) * len(ranges)
+        axes = [np.linspace(lo, hi, n)
+                for (lo, hi), n in zip(ranges, resolution)]
+        points = np.stack(np.meshgrid(*axes, indexing='ij'),
+                          axis=-1).reshape(-1, len(axes))
+        grid = np.asarray(model.batch_output(points), dtype=float)
+        return cls(grid.reshape(tuple(resolution)), ranges, output_scale)
+
+    def compile(self):
+        return self
+
+    def output(self, data, antinorm=False):
+        if self.grid.ndim == 3:
+            res = self.__output_3d(data)
+        else:
+            res = self.__output_nd(data)
+        if antinorm:
+            return max(min(res * self.output_scale, self.output_scale),
+                       -self.output_scale)
+        return res
+
+    def __output_3d(self, data):
+        """The trilinear interpolation unrolled for the radar distances."""
+        (lo0, lo1, lo2), (hi0, hi1, hi2) = self.__lower, self.__upper
+        sc0, sc1, sc2 = self.__scales
+        last0, last1, last2 = self.__last_cell
+        st0, st1, st2 = self.__strides
+        x0, x1, x2 = data
+        p0 = (min(max(x0, lo0), hi0) - lo0) * sc0
+        p1 = (min(max(x1, lo1), hi1) - lo1) * sc1
+        p2 = (min(max(x2, lo2), hi2) - lo2) * sc2
+        c0, c1, c2 = min(int(p0), last0), min(int(p1), last1), \
+            min(int(p2), last2)
+        f0, f1, f2 = p0 - c0, p1 - c1, p2 - c2
+        v = self.__values
+        i = c0 * st0 + c1 * st1 + c2 * st2
+        j = i + st1
+        # interpolate along the last, the middle and then the first axis
+        a = v[i] + (v[i + st2] - v[i]) * f2
+        b = v[j] + (v[j + st2] - v[j]) * f2
+        i += st0
+        j += st0
+        c = v[i] + (v[i + st2] - v[i]) * f2
+        d = v[j] + (v[j + st2] - v[j]) * f2
+        ab = a + (b - a) * f1
+        return ab + (c + (d - c) * f1 - ab) * f0
+
+    def __output_nd(self, data):
+        base = 0
+        fracs = []
+        for x, lo, hi, scale, last, stride in zip(
+                data, self.__lower, self.__upper, self.__scales,
+                self.__last_cell, self.__strides):
+            pos = (min(max(x, lo), hi) - lo) * scale
+            cell = min(int(pos), last)
+            base += cell * stride
+            fracs.append(pos - cell)
+
+        res = 0.0
+        for corner in self.__corners:
+            weight = 1.0
+            idx = base
+            for offset, frac, stride in zip(corner, fracs, self.__strides):
+                if offset:
+                    weight *= frac
+                    idx += stride
+                else:
+                    weight *= 1 - frac
+            res += weight * self.__values[idx]
+        return res
+
+    def batch_output(self, data, antinorm=False):
+        """Get the interpolated outputs of every row of the data.
+
+        Args:
+            data (numpy.ndarray): The input data in shape (n_samples, dim).
+            antinorm (bool, optional): Defaults to False. If the outputs should
+                be antinormalized.
+
+        Returns:
+            numpy.ndarray: The outputs in shape (n_samples,).
+        """
+
+        data = np.atleast_2d(np.asarray(data, dtype=float))
+        lower = np.array(self.__lower)
+        pos = (np.clip(data, lower, self.__upper) - lower) * self.__scales
+        cells = np.minimum(pos.astype(int), self.__last_cell)
+        fracs = pos - cells
+
+        res = np.zeros(len(data))
+        for corner in self.__corners:
+            corner = np.array(corner)
+            weights = np.where(corner, fracs, 1 - fracs).prod(axis=1)
+            res += weights * self.grid[tuple((cells + corner).T)]
+        if antinorm:
+            return antinormalize(res, self.output_scale)
+        return res
+
+    def out_of_range(self, data):
+        """Get the mask of the rows of the data which are clamped."""
+        data = np.atleast_2d(np.asarray(data, dtype=float))
+        return ((data < self.__lower) | (data > self.__upper)).any(axis=1)
+
+
+def lookup_error_report(table, model, data, expected=None):
+    """Compare the antinormalized outputs of a lookup table with the exact
+    outputs of its model.
+
+    Args:
+        table (LookupTable): The lookup table.
+        model (RBFN): The model with method `batch_output(data, antinorm)`.
+        data (numpy.ndarray): The inputs, e.g. of the training dataset, in
+            shape (n_samples, dim).
+        expected (numpy.ndarray, optional): Defaults to None. The expected
+            outputs to compare both with.
+
+    Returns:
+        dict: `mae`, `max_error` and `rmse` of the table against the model,
+            `out_of_range` the ratio of the inputs clamped by the table, and
+            `model_mae` and `table_mae` against the expected outputs if given.
+    """
+
+    data = np.atleast_2d(np.asarray(data, dtype=float))
+    exact = model.batch_output(data, antinorm=True)
+    approx = table.batch_output(data, antinorm=True)
+    errs = np.abs(approx - exact)
+    report = {
+        'mae': float(errs.mean()),
+        'max_error': float(errs.max()),
+        'rmse': float(np.sqrt((errs**2).mean())),
+        'out_of_range': float(table.out_of_range(data).mean())
+    }
+    if expected is not None:
+        expected = np.asarray(expected, dtype=float)
+        report['model_mae'] = float(np.abs(exact - expected).mean())
+        report['table_mae'] = float(np.abs(approx - expected).mean())
+    return report
@@ -0,0 +1,155 @@
+"""
+Define the compiled maps which are built once for each map file and shared
+by every `Car` and simulator on the same map. They are cached in memory and
+on disk, keyed by the hash of the file contents. The cache files keep the
+spatial index of the large maps, so loading them does not rebuild it.
+"""
+
+import hashlib
+import os
+import pathlib
+
+import numpy as np
+
+from .walls import Walls, WallGrid
+
+# bump this if the content of the cache files changes
+CACHE_VERSION = 2
+
+# the arrays of `WallGrid.to_arrays` in the order of `WallGrid.from_arrays`
+GRID_ARRAYS = ('origin', 'cell_size', 'shape', 'cell_offsets', 'cell_walls')
+
+_cache = {}
+
+
+def default_cache_dir():
+    """Get the folder of the cache files."""
+    root = os.environ.get('XDG_CACHE_HOME',
+                          os.path.join(os.path.expanduser('~'), '.cache'))
+    return pathlib.Path(root, 'pso_car', 'maps')
+
+
+class CompiledMap(object):
+    def __init__(self, key, start, end_area, points, grid=None):
+        """The map with its walls as float arrays.
+
+        Args:
+            key (str): the hash of the map file contents.
+            start (tuple): (x, y, angle) of the car at the start.
+            end_area (tuple): ((left, top), (right, bottom)) of the ending
+                area.
+            points (numpy.ndarray): the edge points of the walls in shape
+                (nwall + 1, 2).
+            grid (WallGrid, optional): Defaults to None. The spatial index of
+                the walls already built on the points.
+        """
+
+        self.key = key
+        self.start_pos = (float(start[0]), float(start[1]))
+        self.start_angle = float(start[2])
+        self.end_area_lt = tuple(float(v) for v in end_area[0])
+        self.end_area_rb = tuple(float(v) for v in end_area[1])
+        self.points = np.asarray(points, dtype=float)
+        self.walls = Walls(self.points, grid=grid)
+
+    @classmethod
+    def parse(cls, key, text):
+        """Build the compiled map from the contents of a map file."""
+        contents = [tuple(map(float, line.split(',')))
+                    for line in text.splitlines() if line.strip()]
+        return cls(key, contents[0], (contents[1], contents[2]),
+                   [pt[:2] for pt in contents[3:]])
+
+    @classmethod
+    def load(cls, filepath):
+        """Load the compiled map from a cache file."""
+        with np.load(str(filepath)) as data:
+            if int(data['version']) != CACHE_VERSION:
+                raise ValueError('The cache version does not match.')
+            if 'grid_cell_walls' in data:
+                grid = WallGrid.from_arrays(
+                    *(data['grid_' + name] for name in GRID_ARRAYS))
+            else:
+                grid = None
+            return cls(str(data['key']), data['start'],
+                       data['end_area'], data['points'], grid)
+
+    def save(self, filepath):
+        """Save the compiled map as a cache file. The file is replaced at
+        once, so an interrupted saving never leaves a partial cache file."""
+        arrays = {}
+        if self.walls.grid is not None:
+            arrays = {'grid_' + name: value for name, value in
+                      self.walls.grid.to_arrays().items()}
+        # every process writes its own temporary file
+        tmp_path = '{}.{}.tmp'.format(filepath, os.getpid())
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, version=CACHE_VERSION, key=self.key,
+                         start=np.array(self.start_pos + (self.start_angle,)),
+                         end_area=np.array((self.end_area_lt,
+                                            self.end_area_rb)),
+                         points=self.points, **arrays)
+            os.replace(tmp_path, str(filepath))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @property
+    def ending_area(self):
+        return (self.end_area_lt, self.end_area_rb)
+
+    def to_dict(self):
+        """Get the map in the format of `read_maps`."""
+        return {
+            "start_pos": self.start_pos,
+            "start_angle": self.start_angle,
+            "end_area_lt": self.end_area_lt,  # ending area - left-top
+            "end_area_rb": self.end_area_rb,  # ending area - right-bottom
+            "route_edge": [tuple(pt) for pt in self.points],
+            "compiled": self
+        }
+
+
+def compile_map(filepath, cache_dir=None):
+    """Get the compiled map of a map file. The result is shared by every call
+    with a file of the same contents.
+
+    Args:
+        filepath (str): the path of the map file.
+        cache_dir (str, optional): Defaults to None. The folder of the cache
+            files. Use `default_cache_dir()` if None, and do not cache on disk
+            if False.
+
+    Returns:
+        CompiledMap: the compiled map.
+    """
+
+    raw = pathlib.Path(filepath).read_bytes()
+    key = hashlib.sha1(raw).hexdigest()
+    if key in _cache:
+        return _cache[key]
+
+    if cache_dir is None:
+        cache_dir = default_cache_dir()
+    cache_file = pathlib.Path(cache_dir, key + '.npz') if cache_dir else None
+    compiled = None
+    if cache_file is not None and cache_file.exists():
+        try:
+            compiled = CompiledMap.load(cache_file)
+        except Exception:
+            # a broken or stale cache file is rebuilt, e.g. a truncated zip
+            # raises `zipfile.BadZipFile` and an empty file `EOFError`
+            compiled = None
+    if compiled is None:
+        compiled = CompiledMap.parse(key, raw.decode())
+        if cache_file is not None:
+            try:
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                compiled.save(cache_file)
+            except OSError:
+                # the cache on disk is only an optimization
+                pass
+    _cache[key] = compiled
+    return compiled
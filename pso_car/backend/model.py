@@ -0,0 +1,143 @@
+"""
+Define the binary file format of the trained RBFN models. A model file is a
+fixed header followed by the flat parameter vector in the layout of
+`RBFN.load_model`, so it is read at once into a ready-to-run model which is
+compiled into `CompiledRBFN` without building any `Neuron`.
+"""
+
+import pathlib
+
+import numpy as np
+
+from .fitness import unpack_params
+from .rbfn import CompiledRBFN
+
+MODEL_MAGIC = b'PSOCRBFN'
+# bump this if the layout of the model files changes
+MODEL_VERSION = 1
+
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'),
+    ('version', '<u4'),
+    ('nneuron', '<u4'),
+    ('data_dim', '<u4'),
+    ('nparam', '<u4'),
+    ('mean_range', '<f8', (2,)),  # the range of the normalized inputs
+    ('output_scale', '<f8')  # the antinormalized outputs are clipped to it
+])
+
+
+class TrainedModel(object):
+    def __init__(self, params, nneuron, mean_range=(0, 40), output_scale=40):
+        """The trained RBFN as its flat parameter vector.
+
+        Args:
+            params (numpy.ndarray): The parameters in the layout of
+                `RBFN.load_model`.
+            nneuron (int): Number of neuron in RBFN without the threshold.
+            mean_range (tuple of floats, optional): Defaults to (0, 40). The
+                (min, max) of the means, i.e. the range of the inputs.
+            output_scale (float, optional): Defaults to 40. The scale of
+                antinormalizing the outputs.
+        """
+
+        self.params = np.asarray(params, dtype=float)
+        self.nneuron = int(nneuron)
+        nmean = len(self.params) - 2 * self.nneuron - 1
+        if nmean <= 0 or nmean % self.nneuron:
+            raise ValueError('The number of parameters {} does not match {} '
+                             'neurons.'.format(len(self.params), nneuron))
+        self.data_dim = nmean // self.nneuron
+        self.mean_range = tuple(float(v) for v in mean_range)
+        self.output_scale = float(output_scale)
+
+        self.__compiled = None
+
+    def compile(self):
+        """Get the flattened predictor of the parameters.
+
+        Returns:
+            CompiledRBFN: The predictor.
+        """
+
+        if self.__compiled is None:
+            weights, means, sds = unpack_params(self.params, self.nneuron)
+            self.__compiled = CompiledRBFN(weights[0], means[0], sds[0],
+                                           self.output_scale)
+        return self.__compiled
+
+    def output(self, data, antinorm=False):
+        return self.compile().output(data, antinorm)
+
+    def batch_output(self, data, antinorm=False):
+        """Get the outputs of every row of the data.
+
+        Args:
+            data (numpy.ndarray): The input data in shape (n_samples, dim).
+            antinorm (bool, optional): Defaults to False. If the outputs should
+                be antinormalized.
+
+        Returns:
+            numpy.ndarray: The outputs in shape (n_samples,).
+        """
+
+        return self.compile().batch_output(data, antinorm)
+
+
+def write_model(filepath, params, nneuron, mean_range=(0, 40),
+                output_scale=40):
+    """Write a trained RBFN into a model file.
+
+    Args:
+        filepath (str): The path of the model file.
+        params (numpy.ndarray): The parameters in the layout of
+            `RBFN.load_model`.
+        nneuron (int): Number of neuron in RBFN without the threshold.
+        mean_range (tuple of floats, optional): Defaults to (0, 40). The
+            (min, max) of the means, i.e. the range of the inputs.
+        output_scale (float, optional): Defaults to 40. The scale of
+            antinormalizing the outputs.
+    """
+
+    model = TrainedModel(params, nneuron, mean_range, output_scale)
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header['magic'] = MODEL_MAGIC
+    header['version'] = MODEL_VERSION
+    header['nneuron'] = model.nneuron
+    header['data_dim'] = model.data_dim
+    header['nparam'] = len(model.params)
+    header['mean_range'] = model.mean_range
+    header['output_scale'] = model.output_scale
+    pathlib.Path(filepath).write_bytes(
+        header.tobytes() + model.params.astype('<f8').tobytes())
+
+
+def read_model(filepath):
+    """Read a model file written by `write_model`.
+
+    Args:
+        filepath (str): The path of the model file.
+
+    Returns:
+        TrainedModel: The ready-to-run model.
+    """
+
+    raw = pathlib.Path(filepath).read_bytes()
+    if len(raw) < HEADER_DTYPE.itemsize:
+        raise ValueError('The model file is truncated.')
+    header = np.frombuffer(raw, dtype=HEADER_DTYPE, count=1)[0]
+    if header['magic'] != MODEL_MAGIC:
+        raise ValueError('This is not a model file.')
+    if header['version'] != MODEL_VERSION:
+        raise ValueError('The model version {} is not supported.'.format(
+            header['version']))
+    nparam = int(header['nparam'])
+    if len(raw) != HEADER_DTYPE.itemsize + nparam * 8:
+        raise ValueError('The model file is truncated.')
+    params = np.frombuffer(raw, dtype='<f8', count=nparam,
+                           offset=HEADER_DTYPE.itemsize)
+    model = TrainedModel(params, header['nneuron'], header['mean_range'],
+                         header['output_scale'])
+    if model.data_dim != header['data_dim']:
+        raise ValueError('The input dimension does not match the parameters.')
+    return model
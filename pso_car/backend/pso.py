@@ -1,73 +1,81 @@
-import copy
-import random
-import multiprocessing as mp
-import operator
+import math
 import time
 
 from PySide2.QtCore import QThread, Slot, Signal
 
-from .individual import Individual
+from .engine import PSOEngine, summarize_errors
+from .islands import IslandEngine
 from .rbfn import RBFN
 
 
 class PSO(QThread):
     sig_console = Signal(str)
-    sig_current_iter_time = Signal(int)
-    sig_current_error = Signal(float)
-    sig_iter_error = Signal(float, float, float)
+    sig_progress = Signal(dict)
     sig_indicate_busy = Signal()
     sig_rbfn = Signal(RBFN)
 
     def __init__(self, iter_times, population_size, inertia_weight,
                  cognitive_const_upper, social_const_upper, v_max, nneuron,
-                 dataset, sd_max=1, is_multicore=True):
+                 dataset, sd_max=1, is_multicore=True, fitness=None,
+                 report_rate=10, checkpoint=None, checkpoint_every=100,
+                 resume=None, early_stopping=None, is_async=False, islands=1,
+                 migration_interval=10, migration_size=1, topology='ring'):
         super().__init__()
-        self.abort = False
-        self.iter_times = iter_times
-        self.population_size = population_size
-        self.inertia_weight = inertia_weight
-        self.cognitive_const_upper = cognitive_const_upper
-        self.social_const_upper = social_const_upper
-        self.dataset = dataset
-        self.is_multicore = is_multicore
-
-        self.population = [Individual(self.dataset, nneuron, v_max, sd_max)
-                           for _ in range(self.population_size)]
-        self.rbfn = RBFN(nneuron, (0, 40), sd_max)
+        if islands > 1:
+            if checkpoint is not None or resume is not None:
+                raise ValueError('The island model does not support '
+                                 'checkpoints.')
+            self.engine = IslandEngine(islands, iter_times, population_size,
+                                       inertia_weight, cognitive_const_upper,
+                                       social_const_upper, v_max, nneuron,
+                                       dataset, sd_max, fitness,
+                                       migration_interval, migration_size,
+                                       topology, early_stopping)
+        else:
+            self.engine = PSOEngine(iter_times, population_size,
+                                    inertia_weight, cognitive_const_upper,
+                                    social_const_upper, v_max, nneuron,
+                                    dataset, sd_max, is_multicore, fitness,
+                                    checkpoint, checkpoint_every,
+                                    early_stopping, is_async)
+        if resume is not None:
+            self.engine.load_checkpoint(resume)
+        self.rbfn = RBFN(nneuron, self.engine.fitness.mean_range, sd_max)
+        # the maximum number of progress reports per second
+        self.report_interval = 1 / report_rate
+        self.__history = []
+        self.__progress = None
+        self.__last_report = -math.inf
 
     def run(self):
-        total_best = copy.deepcopy(self.population[0])
-        for i in range(self.iter_times):
-            if self.abort:
-                break
-            self.sig_current_iter_time.emit(i)
-
-            # get the best individual in current iteration
-            global_best = self.__get_best_individual()
-
-            # save the best individual in whole training
-            total_best = copy.deepcopy(
-                min((total_best, global_best), key=operator.attrgetter('err')))
-            self.__show_errs(global_best, total_best)
-
-            # update the position and velocity for each individual
-            for indiv in self.population:
-                indiv.update_position(self.inertia_weight,
-                                      random.uniform(
-                                          0, self.cognitive_const_upper),
-                                      random.uniform(
-                                          0, self.social_const_upper),
-                                      global_best.position)
-        self.sig_indicate_busy.emit()
-        self.sig_console.emit('Selecting the best individual...')
-        global_best = self.__get_best_individual()
-        total_best = copy.deepcopy(
-            min((total_best, global_best), key=operator.attrgetter('err')))
-        self.__show_errs(global_best, total_best)
-        self.sig_console.emit('The least error: %f' % total_best.err)
+        if self.engine.iteration:
+            self.sig_console.emit(
+                'Resume from iteration {} with the hyperparameters of the '
+                'checkpoint: {}.'.format(self.engine.iteration + 1, ', '.join(
+                    '{} {:g}'.format(name, value) for name, value in
+                    self.engine.hyperparameters.items())))
+        with self.engine:
+            for progress in self.engine.iterate():
+                self.__show_errs(progress)
+            self.__show_errs(None, force=True)
+            if self.engine.stop_reason is not None:
+                self.sig_console.emit('Early stopping at iteration {}: {}'
+                                      .format(self.__progress.iteration + 1,
+                                              self.engine.stop_reason))
+            self.sig_indicate_busy.emit()
+            self.sig_console.emit('Selecting the best individual...')
+            self.__show_errs(self.engine.finalize(), force=True)
+        if self.engine.checkpoint is not None:
+            self.sig_console.emit('The checkpoint of iteration {} has been '
+                                  'written to {}.'.format(
+                                      self.engine.iteration,
+                                      self.engine.checkpoint))
+        self.sig_console.emit('The least error: %f' %
+                              self.engine.total_best_err)
         self.sig_console.emit(
-            'The best individual: \n{}'.format(total_best.position))
-        self.rbfn.load_model(total_best.position)
+            'The best individual: \n{}'.format(
+                self.engine.total_best_position))
+        self.rbfn.load_model(self.engine.total_best_position)
         self.sig_rbfn.emit(self.rbfn)
 
     @Slot()
@@ -77,27 +85,29 @@ class PSO(QThread):
                 'WARNING: User interrupts running thread. The thread will be '
                 'stop in next iteration. Please wait a second...')
 
-        self.abort = True
-
-    def __get_best_individual(self):
-        """Update every individual's fitness and return the best individual."""
-        if self.is_multicore:
-            with mp.Pool() as pool:
-                res = pool.map(get_indiv_fitness_update, self.population)
-                for indiv, result in zip(self.population, res):
-                    indiv.fitness = result
-            return max(self.population, key=lambda indiv: indiv.fitness)
-        return max(self.population, key=lambda indiv: indiv.update_fitness())
-
-    def __show_errs(self, global_best, total_best):
-        for indiv in self.population:
-            time.sleep(0.001)
-            self.sig_current_error.emit(indiv.err)
-        self.sig_iter_error.emit(
-            sum(i.err for i in self.population) / len(self.population),
-            global_best.err, total_best.err)
-
-
-def get_indiv_fitness_update(indiv):
-    """ This function is designed for multiprocessing.Pool() """
-    return indiv.update_fitness()
+        self.engine.stop()
+
+    def __show_errs(self, progress, force=False):
+        """Emit one summary of the iterations since the last report, at most
+        `1 / report_interval` times per second unless `force` is True."""
+        if progress is not None:
+            self.__history.append((progress.iteration,
+                                   float(progress.errs.mean()),
+                                   progress.global_best_err,
+                                   progress.total_best_err))
+            self.__progress = progress
+        now = time.monotonic()
+        if not self.__history or (
+                not force and now - self.__last_report < self.report_interval):
+            return
+        self.__last_report = now
+        self.sig_progress.emit({
+            'iteration': self.__progress.iteration,
+            'summary': summarize_errors(self.__progress.errs),
+            'global_best_err': self.__progress.global_best_err,
+            'total_best_err': self.__progress.total_best_err,
+            # (iteration, average, global best, total best) of every
+            # iteration since the last report
+            'history': self.__history
+        })
+        self.__history = []
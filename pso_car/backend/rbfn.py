@@ -3,13 +3,30 @@ import random
 
 import numpy as np
 
+from .fitness import antinormalize, gaussian_output, mask_neurons
+
 
 class RBFN(object):
     def __init__(self, nneuron, mean_range, sd_max=1):
+        self.mean_range = tuple(mean_range)
         self.neurons = [Neuron(sd=random.uniform(0, sd_max),
                                mean_range=mean_range) for j in range(nneuron)]
         self.neurons.insert(0, Neuron(is_threshold=True))
 
+    @property
+    def nneuron(self):
+        """Number of neuron without the threshold."""
+        return len(self.neurons) - 1
+
+    @property
+    def params(self):
+        """Every parameters in the layout of `load_model`."""
+        neurons = self.neurons[1:]
+        return np.concatenate((
+            [self.neurons[0].sw], [n.sw for n in neurons],
+            *(np.asarray(n.mean, dtype=float) for n in neurons),
+            [n.sd for n in neurons])).astype(float)
+
     def output(self, data, antinorm=False):
         data = np.array(data)
         for neuron in self.neurons:
@@ -19,6 +36,56 @@ class RBFN(object):
             return self.__antinormalize(res)
         return res
 
+    def batch_output(self, data, antinorm=False):
+        """Get the outputs of every row of the data in one vectorized call.
+
+        Args:
+            data (numpy.ndarray): The input data in shape (n_samples, dim).
+            antinorm (bool, optional): Defaults to False. If the outputs should
+                be antinormalized.
+
+        Returns:
+            numpy.ndarray: The outputs in shape (n_samples,).
+        """
+
+        data = np.atleast_2d(np.asarray(data, dtype=float))
+        for neuron in self.neurons[1:]:
+            if neuron.mean is None:
+                neuron.mean = np.random.uniform(*neuron.mean_range,
+                                                size=data.shape[1])
+        return self.compile().batch_output(data, antinorm)
+
+    def evaluate(self, data, expected, antinorm=True):
+        """Get the outputs and the mean absolute error of a whole dataset.
+
+        Args:
+            data (numpy.ndarray): The input data in shape (n_samples, dim).
+            expected (numpy.ndarray): The expected outputs in shape
+                (n_samples,).
+            antinorm (bool, optional): Defaults to True. If the outputs should
+                be antinormalized before comparing with `expected`.
+
+        Returns:
+            tuple: (outputs, mean absolute error).
+        """
+
+        res = self.batch_output(data, antinorm)
+        return res, float(np.abs(np.asarray(expected, dtype=float) - res).mean())
+
+    def compile(self):
+        """Get the flattened predictor of current parameters.
+
+        Returns:
+            CompiledRBFN: The predictor without any `Neuron`.
+        """
+
+        neurons = self.neurons[1:]
+        if any(n.mean is None for n in neurons):
+            raise ValueError('The means have not been initialized.')
+        return CompiledRBFN([n.sw for n in self.neurons],
+                            [n.mean for n in neurons],
+                            [n.sd for n in neurons])
+
     def load_model(self, params):
         """Load every parameters into the RBFN model.
 
@@ -49,6 +116,59 @@ class RBFN(object):
         return max(min(value * 40, 40), -40)
 
 
+class CompiledRBFN(object):
+    def __init__(self, weights, centers, sds, output_scale=40):
+        """The RBFN flattened into arrays for low-latency inference.
+
+        Args:
+            weights (numpy.ndarray): The synaptic weights in shape
+                (nneuron + 1,) whose first one is of the threshold.
+            centers (numpy.ndarray): The means in shape (nneuron, dim).
+            sds (numpy.ndarray): The standard deviations in shape (nneuron,).
+            output_scale (float, optional): Defaults to 40. The scale of
+                antinormalizing the outputs.
+        """
+
+        weights = np.asarray(weights, dtype=float)
+        self.threshold = float(weights[0])
+        self.weights, self.factors = mask_neurons(weights[1:], sds)
+        self.centers = np.asarray(centers, dtype=float).reshape(
+            len(self.factors), -1)
+        self.output_scale = float(output_scale)
+
+    def output(self, data, antinorm=False):
+        diff = self.centers - data
+        res = float(gaussian_output((diff * diff).sum(axis=1), self.threshold,
+                                    self.weights, self.factors))
+        if antinorm:
+            return max(min(res * self.output_scale, self.output_scale),
+                       -self.output_scale)
+        return res
+
+    def batch_output(self, data, antinorm=False):
+        """Get the outputs of every row of the data.
+
+        Args:
+            data (numpy.ndarray): The input data in shape (n_samples, dim).
+            antinorm (bool, optional): Defaults to False. If the outputs should
+                be antinormalized.
+
+        Returns:
+            numpy.ndarray: The outputs in shape (n_samples,).
+        """
+
+        diff = np.atleast_2d(np.asarray(data, dtype=float))[:, np.newaxis] \
+            - self.centers
+        res = gaussian_output(np.einsum('sij,sij->si', diff, diff),
+                              self.threshold, self.weights, self.factors)
+        if antinorm:
+            return antinormalize(res, self.output_scale)
+        return res
+
+    def compile(self):
+        return self
+
+
 class Neuron(object):
     def __init__(self, mean=None, sd=random.uniform(0, 1),
                  is_threshold=False, mean_range=None):
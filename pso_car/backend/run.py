@@ -1,7 +1,11 @@
+import functools
+import math
 import time
 
 from PySide2.QtCore import QThread, Signal, Slot
 
+from .episode import Outcome, run_episode
+
 
 class RunCar(QThread):
     sig_console = Signal(str)
@@ -10,64 +14,104 @@ class RunCar(QThread):
     sig_dists = Signal(list, list, list)
     sig_results = Signal(list)
 
-    def __init__(self, car, rbfn, ending_area=None, fps=20):
+    def __init__(self, car, rbfn, ending_area=None, fps=20, speed=None):
+        """The thread driving the car and replaying its trajectory.
+
+        Args:
+            car (Car): The car at the start position.
+            rbfn (RBFN): The model controlling the car, which is compiled
+                before driving.
+            ending_area (tuple, optional): Defaults to None. The
+                ((left, top), (right, bottom)) of the ending area.
+            fps (int, optional): Defaults to 20. The number of steps replayed
+                per second at the speed of 1.
+            speed (float, optional): Defaults to None. If None, wait 1 / `fps`
+                seconds and emit `sig_car` and `sig_dists` for every step.
+                Otherwise, replay `speed` times faster without emitting the
+                steps, and the GUI samples the latest step by `latest_state()`
+                at its own refresh rate. `math.inf` replays at full speed.
+        """
+
         super().__init__()
         self.car = car
         self.rbfn = rbfn
         self.abort = False
-        self.ending_lt = ending_area[0]
-        self.ending_rb = ending_area[1]
+        self.ending_area = ending_area
         self.waiting_time = 1 / fps
+        self.speed = speed
+        self.trajectory = None
+        self.__current = -1
 
     @Slot()
     def run(self):
-        results = list()
-        radar_dir = ['front', 'left', 'right']
-        while True:
-            if self.abort:
-                break
-            time.sleep(self.waiting_time)
-            radars = tuple(self.car.dist(d) for d in radar_dir)
-            self.sig_car.emit(self.car.pos, self.car.angle,
-                              self.car.wheel_angle)
-            self.sig_dists.emit(self.car.pos, *map(list, zip(*radars)))
+        trajectory, outcome = run_episode(
+            self.car,
+            functools.partial(self.rbfn.compile().output, antinorm=True),
+            self.ending_area, should_stop=lambda: self.abort)
+        self.trajectory = trajectory
 
-            if (self.ending_lt[0] <= self.car.pos[0] <= self.ending_rb[0]
-                    and self.ending_lt[1] >= self.car.pos[1] >= self.ending_rb[1]):
+        # replay the trajectory for display
+        if self.speed is None:
+            self.__replay_every_step()
+        else:
+            self.__replay_sampled()
+
+        if self.__current == len(self.trajectory) - 1:
+            if outcome is Outcome.ARRIVED:
                 self.sig_console.emit("Note: Car has arrived at the ending "
                                       "area.")
-                self.abort = True
-                break
-
-            if self.car.is_collided:
+            elif outcome is Outcome.COLLIDED:
                 self.sig_console.emit("Note: Car has collided.")
                 self.sig_car_collided.emit()
-                self.abort = True
-                break
-
-            dists = list(zip(*radars))[1]
-            try:
-                dists = list(map(float, dists))
-            except ValueError:
-                self.abort = True
+            elif outcome is Outcome.LOST:
                 self.sig_console.emit("Error: Cannot input the fuzzy system "
                                       "since the distance type error.")
+            else:
+                self.sig_console.emit("Note: Car has run out of steps.")
+            self.abort = True
+        self.sig_results.emit(trajectory_results(
+            self.trajectory[:self.__current + 1]))
+
+    def __replay_every_step(self):
+        for idx in range(len(self.trajectory)):
+            if self.abort:
+                break
+            time.sleep(self.waiting_time)
+            self.__current = idx
+            pos, angle, wheel_angle, intersections, dists = \
+                replay_state(self.trajectory, idx)
+            self.sig_car.emit(pos, angle, wheel_angle)
+            self.sig_dists.emit(pos, intersections, dists)
+
+    def __replay_sampled(self):
+        last = len(self.trajectory) - 1
+        step_rate = self.speed / self.waiting_time
+        start = time.perf_counter()
+        while not self.abort:
+            elapsed = time.perf_counter() - start
+            if math.isinf(step_rate):
+                self.__current = last
+            else:
+                self.__current = min(int(elapsed * step_rate), last)
+            if self.__current == last:
                 break
+            # wake up at the next step, but never busy waiting
+            time.sleep(max((self.__current + 1) / step_rate - elapsed,
+                           0.001))
 
-            next_wheel_angle = self.rbfn.output((dists[0], dists[2], dists[1]),
-                                                antinorm=True)
+    def latest_state(self):
+        """Get the latest replayed step.
 
-            results.append({
-                'x': self.car.pos[0],
-                'y': self.car.pos[1],
-                'front_dist': radars[0][1],
-                'right_dist': radars[2][1],
-                'left_dist': radars[1][1],
-                'wheel_angle': next_wheel_angle
-            })
+        Returns:
+            tuple: (index of the step, (pos, angle, wheel_angle,
+                intersections, dists)) in the form of the arguments of
+                `sig_car` and `sig_dists`, or None if nothing is replayed.
+        """
 
-            self.car.move(next_wheel_angle)
-        self.sig_results.emit(results)
+        idx = self.__current
+        if idx < 0:
+            return None
+        return idx, replay_state(self.trajectory, idx)
 
     @Slot()
     def stop(self):
@@ -75,3 +119,43 @@ class RunCar(QThread):
             self.sig_console.emit("WARNING: User interrupts running thread.")
 
         self.abort = True
+
+
+def replay_state(trajectory, idx):
+    """Get the (pos, angle, wheel_angle, intersections, dists) of a step of
+    trajectory, where the wheel angle is the one turning the car into this
+    step and the radars are in the order of front, left and right."""
+    state = trajectory[idx]
+    pos = [float(state['x']), float(state['y'])]
+    wheel_angle = float(trajectory[idx - 1]['wheel_angle']) if idx else 0.0
+    radars = [radar_reading(state, d) for d in ('front', 'left', 'right')]
+    intersections, dists = map(list, zip(*radars))
+    return pos, float(state['angle']), wheel_angle, intersections, dists
+
+
+def trajectory_results(trajectory):
+    """Get the records of the steps with a decided wheel angle."""
+    results = list()
+    for idx, state in enumerate(trajectory):
+        wheel_angle = float(state['wheel_angle'])
+        if math.isnan(wheel_angle):
+            continue
+        pos, _, _, _, dists = replay_state(trajectory, idx)
+        results.append({
+            'x': pos[0],
+            'y': pos[1],
+            'front_dist': dists[0],
+            'right_dist': dists[2],
+            'left_dist': dists[1],
+            'wheel_angle': wheel_angle
+        })
+    return results
+
+
+def radar_reading(state, direction):
+    """Get the (intersection, distance) of a radar from a state of trajectory
+    in the same form as `Car.dist`."""
+    dist = float(state[direction + '_dist'])
+    if math.isnan(dist):
+        return (None, '--')
+    return ([float(v) for v in state[direction + '_pt']], dist)
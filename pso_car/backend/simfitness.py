@@ -0,0 +1,116 @@
+"""
+Define the closed-loop fitting function which scores every particle by
+driving its RBFN on maps with the batch simulator.
+"""
+
+import hashlib
+
+import numpy as np
+
+from .batch import BatchSimulator, ParamsController
+from .episode import Outcome
+
+
+class SimulationFitness(object):
+
+    def __init__(self, maps, nneuron, max_steps=1000, collision_penalty=1.0,
+                 step_weight=0.1, mean_range=(0, 40)):
+        """The fitting function of driving the car on maps. The error of a
+        particle on a map is the sum of:
+
+        * The remaining straight-line distance from the last position to the
+          center of the ending area, divided by the one from the start
+          position (0 if the car arrives).
+        * `collision_penalty` if the car collides or loses any radar.
+        * `step_weight` times the ratio of the moves to `max_steps`.
+
+        and the error of a particle is the mean of the errors on every map.
+
+        Arguments:
+            maps {list of dict} -- The maps in the format of `read_maps`.
+            nneuron {int} -- Number of neuron in RBFN without the threshold.
+
+        Keyword Arguments:
+            max_steps {int} -- The maximum of moves in an episode.
+                (default: {1000})
+            collision_penalty {float} -- The error added by a collision.
+                (default: {1.0})
+            step_weight {float} -- The weight of the ratio of the moves.
+                (default: {0.1})
+            mean_range {tuple of floats} -- The (min, max) of the means, i.e.
+                the range of the radar distances. (default: {(0, 40)})
+        """
+
+        self.nneuron = nneuron
+        self.max_steps = max_steps
+        self.collision_penalty = collision_penalty
+        self.step_weight = step_weight
+        self.mean_range = tuple(mean_range)
+        self.maps = []
+        digest = hashlib.sha1('simulation {} {} {}'.format(
+            max_steps, collision_penalty, step_weight).encode())
+        for data in maps:
+            if 'compiled' in data:
+                # the hash of the map file contents
+                digest.update(data['compiled'].key.encode())
+            else:
+                digest.update(repr((data['start_pos'], data['start_angle'],
+                                    data['end_area_lt'], data['end_area_rb'],
+                                    data['route_edge'])).encode())
+            ending_area = (data['end_area_lt'], data['end_area_rb'])
+            goal = np.mean(ending_area, axis=0)[:2]
+            self.maps.append({
+                'simulator': BatchSimulator(
+                    data['compiled'].walls if 'compiled' in data
+                    else data['route_edge'], ending_area),
+                'start_pos': np.asarray(data['start_pos'], dtype=float),
+                'start_angle': data['start_angle'],
+                'goal': goal,
+                'start_dist': max(np.linalg.norm(
+                    goal - np.asarray(data['start_pos'], dtype=float)), 1e-9)
+            })
+        # the identity of the objective for the checkpoints
+        self.fingerprint = digest.hexdigest()
+
+    @property
+    def data_dim(self):
+        """The dimension of the RBFN input: front, right and left distances.
+        """
+        return 3
+
+    def share(self):
+        """The maps are small enough to be copied to every worker."""
+
+    def release(self):
+        """Nothing to free since nothing is shared."""
+
+    def errors(self, positions):
+        """Get the error of every position by driving on every map.
+
+        Arguments:
+            positions {numpy.ndarray} -- The parameters in shape
+                (nparticle, ndim).
+
+        Returns:
+            numpy.ndarray -- The errors in shape (nparticle,).
+        """
+
+        positions = np.atleast_2d(positions)
+        controller = ParamsController(positions, self.nneuron)
+        errs = np.zeros(len(positions))
+        for data in self.maps:
+            res = data['simulator'].run(controller, data['start_pos'],
+                                        data['start_angle'],
+                                        ncar=len(positions),
+                                        max_steps=self.max_steps)
+            remaining = np.linalg.norm(res.positions - data['goal'], axis=1) \
+                / data['start_dist']
+            remaining[res.is_outcome(Outcome.ARRIVED)] = 0
+            failed = res.is_outcome(Outcome.COLLIDED) | \
+                res.is_outcome(Outcome.LOST)
+            errs += remaining + self.collision_penalty * failed + \
+                self.step_weight * res.steps / self.max_steps
+        return errs / len(self.maps)
+
+    def __call__(self, positions):
+        return self.errors(positions)
@@ -0,0 +1,221 @@
+"""
+Define the swarm for PSO which keeps the whole population as matrices.
+Note: Every row of the position matrix follows the parameter layout of
+      `RBFN.load_model`, and the initialization is the same as `Individual`.
+"""
+
+import numpy as np
+
+
+class Swarm(object):
+
+    def __init__(self, population_size, nneuron, data_dim, mean_range, v_max,
+                 sd_max=1, random_state=None):
+        """Define a swarm with `population_size` particles.
+
+        Arguments:
+            population_size {int} -- The number of particles.
+            nneuron {int} -- Number of neuron in RBFN without the threshold.
+            data_dim {int} -- The dimension of the training data input.
+            mean_range {tuple of floats} -- The (min, max) of the means.
+            v_max {float} -- The maximum of velocity.
+
+        Keyword Arguments:
+            sd_max {int} -- The upper bound of standard deviation for each
+                neuron in RBFN while initializing. (default: {1})
+            random_state {numpy.random.RandomState} -- The random generator
+                used by the swarm. (default: {None})
+        """
+
+        self.population_size = population_size
+        self.nneuron = nneuron
+        self.data_dim = data_dim
+        self.mean_range = tuple(mean_range)
+        self.v_max = v_max
+        self.sd_max = sd_max
+        if random_state is None:
+            random_state = np.random.RandomState()
+        self.random_state = random_state
+
+        self.positions = np.hstack((
+            random_state.uniform(-1, 1, size=(population_size, nneuron + 1)),
+            random_state.uniform(*self.mean_range,
+                                 size=(population_size, nneuron * data_dim)),
+            random_state.uniform(0.01, sd_max,
+                                 size=(population_size, nneuron))))
+        self.velocities = random_state.uniform(-v_max, v_max,
+                                               size=self.positions.shape)
+
+        # the position limits of weights, means and SDs
+        self.lower = np.empty(self.ndim)
+        self.upper = np.empty(self.ndim)
+        self.lower[:nneuron + 1], self.upper[:nneuron + 1] = -1, 1
+        self.lower[nneuron + 1:-nneuron] = self.mean_range[0]
+        self.upper[nneuron + 1:-nneuron] = self.mean_range[1]
+        self.lower[-nneuron:], self.upper[-nneuron:] = 0.001, np.inf
+
+        self.errs = np.full(population_size, np.inf)
+        self.best_positions = self.positions.copy()
+        self.best_errs = np.full(population_size, np.inf)
+
+    @property
+    def ndim(self):
+        """The length of the parameter vector of each particle."""
+        return self.positions.shape[1]
+
+    def diversity(self):
+        """The mean distance of the particles to their centroid, where every
+        dimension is normalized by the width of its limits (the SDs by the
+        initial range [0.001, sd_max]). It is about 0.29 for a uniformly
+        initialized swarm and goes to 0 as the swarm collapses.
+
+        Returns:
+            float -- The normalized diversity.
+        """
+
+        width = np.where(np.isfinite(self.upper), self.upper,
+                         max(self.sd_max, 0.002)) - self.lower
+        normalized = self.positions / np.where(width > 0, width, 1)
+        centroid = normalized.mean(axis=0)
+        return float(np.sqrt(((normalized - centroid)**2).sum(axis=1)).mean()
+                     / np.sqrt(self.ndim))
+
+    def emigrants(self, size):
+        """Get the best personal bests to send to other swarms.
+
+        Arguments:
+            size {int} -- The number of emigrants.
+
+        Returns:
+            tuple -- (positions, errors) of the emigrants.
+        """
+
+        best = np.argsort(self.best_errs, kind='stable')[:size]
+        return self.best_positions[best].copy(), self.best_errs[best].copy()
+
+    def immigrate(self, positions, errs):
+        """Replace the particles with the worst personal bests by the
+        immigrants from other swarms. The velocities are kept.
+
+        Arguments:
+            positions {numpy.ndarray} -- The positions of the immigrants.
+            errs {numpy.ndarray} -- The errors of the immigrants.
+        """
+
+        worst = np.argsort(self.best_errs, kind='stable')[::-1][:len(errs)]
+        self.positions[worst] = positions
+        self.best_positions[worst] = positions
+        self.errs[worst] = errs
+        self.best_errs[worst] = errs
+
+    def get_state(self):
+        """Get the arrays of the swarm and the state of its random generator,
+        from which `set_state` continues identically.
+
+        Returns:
+            dict -- The numpy arrays and numbers of the state.
+        """
+
+        _, keys, pos, has_gauss, cached_gaussian = \
+            self.random_state.get_state()
+        return {
+            'positions': self.positions,
+            'velocities': self.velocities,
+            'errs': self.errs,
+            'best_positions': self.best_positions,
+            'best_errs': self.best_errs,
+            'rng_keys': keys,
+            'rng_pos': pos,
+            'rng_has_gauss': has_gauss,
+            'rng_cached_gaussian': cached_gaussian
+        }
+
+    def set_state(self, state):
+        """Restore the state given by `get_state`.
+
+        Arguments:
+            state {dict} -- The numpy arrays and numbers of the state.
+        """
+
+        if np.shape(state['positions']) != self.positions.shape:
+            raise ValueError(
+                'The shape of the positions {} does not match the swarm {}.'
+                .format(np.shape(state['positions']), self.positions.shape))
+        for name in ('positions', 'velocities', 'errs', 'best_positions',
+                     'best_errs'):
+            setattr(self, name, np.array(state[name], dtype=float))
+        self.random_state.set_state(
+            ('MT19937', np.asarray(state['rng_keys'], dtype=np.uint32),
+             int(state['rng_pos']), int(state['rng_has_gauss']),
+             float(state['rng_cached_gaussian'])))
+
+    def update_errs(self, errs, indices=None):
+        """Set the errors of current positions and update the personal bests.
+
+        Arguments:
+            errs {numpy.ndarray} -- The errors of every particle.
+
+        Keyword Arguments:
+            indices {numpy.ndarray} -- Only set the errors of these particles
+                if not None. (default: {None})
+
+        Returns:
+            int -- The index of the best particle in current iteration.
+        """
+
+        if indices is None:
+            self.errs = np.asarray(errs, dtype=float)
+            indices = slice(None)
+        else:
+            self.errs[indices] = errs
+        improved = self.errs[indices] < self.best_errs[indices]
+        indices = np.arange(self.population_size)[indices][improved]
+        self.best_errs[indices] = self.errs[indices]
+        self.best_positions[indices] = self.positions[indices]
+        return int(np.argmin(self.errs))
+
+    def update_positions(self, inertia_weight, cognitive_const_upper,
+                         social_const_upper, global_best_position,
+                         indices=None):
+        """Move every particle in one vectorized step.
+
+        The cognitive and social constants are drawn for each particle from
+        [0, upper), and the clipping rules are the same as
+        `Individual.update_position`. Only move the particles of `indices` if
+        it is not None.
+        """
+
+        if indices is not None:
+            positions = self.positions[indices]
+            velocities = self.velocities[indices]
+            self.__move(velocities, positions, self.best_positions[indices],
+                        inertia_weight, cognitive_const_upper,
+                        social_const_upper, global_best_position)
+            self.velocities[indices] = velocities
+            self.positions[indices] = positions
+            return
+        self.__move(self.velocities, self.positions, self.best_positions,
+                    inertia_weight, cognitive_const_upper, social_const_upper,
+                    global_best_position)
+
+    def __move(self, velocities, positions, best_positions, inertia_weight,
+               cognitive_const_upper, social_const_upper,
+               global_best_position):
+        """Update the velocities and the positions in place."""
+        size = (len(positions), 1)
+        cognitive_const = self.random_state.uniform(
+            0, cognitive_const_upper, size=size)
+        social_const = self.random_state.uniform(
+            0, social_const_upper, size=size)
+
+        velocities *= inertia_weight
+        velocities += cognitive_const * (best_positions - positions)
+        velocities += social_const * (global_best_position - positions)
+
+        # limit the velocity
+        np.clip(velocities, -self.v_max, self.v_max, out=velocities)
+
+        positions += velocities
+
+        # limit the position
+        np.clip(positions, self.lower, self.upper, out=positions)
@@ -0,0 +1,485 @@
+""" Define the walls of a map as float arrays and the vectorized queries on
+them. """
+
+import math
+
+import numpy as np
+
+
+class Walls(object):
+    # the number of walls from which the queries use the spatial index
+    grid_threshold = 512
+
+    def __init__(self, wall_points, grid_threshold=None, grid=None):
+        """The line segments between every two adjacent edge points of a map.
+
+        Args:
+            wall_points (list): a list with all the edge points of the map.
+            grid_threshold (int, optional): Defaults to None. Build a
+                `WallGrid` for the queries if there are at least this
+                number of walls. Use `Walls.grid_threshold` if None.
+            grid (WallGrid, optional): Defaults to None. The grid already
+                built on the same points, e.g. loaded from a cache file.
+        """
+
+        points = np.array([pt[:2] for pt in wall_points], dtype=float)
+        self.starts = points[:-1]
+        self.ends = points[1:]
+        self.vectors = self.ends - self.starts
+        self.sq_lengths = (self.vectors**2).sum(axis=1)
+
+        if grid_threshold is None:
+            grid_threshold = self.grid_threshold
+        if grid is not None:
+            self.grid = grid
+        elif len(self) and len(self) >= grid_threshold:
+            self.grid = WallGrid(self)
+        else:
+            self.grid = None
+
+    def __len__(self):
+        return len(self.starts)
+
+    def cast(self, origin, degree):
+        """Cast a ray against every wall at once and get the closest hit.
+
+        Args:
+            origin (tuple): the (x, y) start point of the ray.
+            degree (float): the direction of the ray in degree.
+
+        Returns:
+            tuple: (intersection, distance). Both are None if the ray hits
+            nothing.
+        """
+
+        direction = (math.cos(math.radians(degree)),
+                     math.sin(math.radians(degree)))
+        if self.grid is not None and self.grid.contains(origin):
+            distance = math.inf
+            for idx, t_exit in self.grid.traverse(origin, direction):
+                if len(idx):
+                    distance = min(distance, self.__intersect(
+                        origin, direction, idx).min())
+                # the walls in the cells after this one are farther
+                if distance < t_exit:
+                    break
+        else:
+            distance = self.__intersect(origin, direction).min()
+        if math.isinf(distance):
+            return None, None
+        distance = float(distance)
+        return (np.array((origin[0] + distance * direction[0],
+                          origin[1] + distance * direction[1])), distance)
+
+    def __intersect(self, origin, direction, idx=slice(None)):
+        """Get the ray parameters of the intersections between a ray and the
+        walls selected by `idx`. They are infinite if there is no hit. The
+        origin and the direction can also be given for each selected wall."""
+        starts, vectors = self.starts[idx], self.vectors[idx]
+        to_starts = starts - origin
+        denoms = direction[0] * vectors[:, 1] - direction[1] * vectors[:, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # the ray parameter and the wall parameter of the intersections
+            ts = (to_starts[:, 0] * vectors[:, 1]
+                  - to_starts[:, 1] * vectors[:, 0]) / denoms
+            us = (to_starts[:, 0] * direction[1]
+                  - to_starts[:, 1] * direction[0]) / denoms
+        hits = (denoms != 0) & (ts > 0) & (us >= 0) & (us <= 1)
+        ts[~hits] = np.inf
+        return ts
+
+    def cast_batch(self, origins, degrees):
+        """Cast many rays against every wall at once and get their closest
+        hits.
+
+        Args:
+            origins (numpy.ndarray): the start points of the rays in shape
+                (nray, 2).
+            degrees (numpy.ndarray): the directions of the rays in degree in
+                shape (nray,).
+
+        Returns:
+            tuple: (intersections, distances) in shape (nray, 2) and (nray,).
+            They are NaN for the rays hitting nothing.
+        """
+
+        origins = np.asarray(origins, dtype=float).reshape(-1, 2)
+        radians = np.radians(degrees)
+        directions = np.stack((np.cos(radians), np.sin(radians)), axis=1)
+        if self.grid is None:
+            distances = self.__cast_dense(origins, directions)
+        else:
+            distances = np.full(len(origins), np.inf)
+            inside = self.grid.contains_batch(origins)
+            if not inside.all():
+                distances[~inside] = self.__cast_dense(origins[~inside],
+                                                       directions[~inside])
+            self.__cast_grid(origins, directions, np.flatnonzero(inside),
+                             distances)
+        distances[np.isinf(distances)] = np.nan
+        return origins + distances[:, np.newaxis] * directions, distances
+
+    def __cast_dense(self, origins, directions):
+        """Get the closest ray parameters of the rays against every wall."""
+        to_starts = self.starts - origins[:, np.newaxis]
+        denoms = np.outer(directions[:, 0], self.vectors[:, 1]) - \
+            np.outer(directions[:, 1], self.vectors[:, 0])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # the ray parameters and the wall parameters of the intersections
+            ts = (to_starts[:, :, 0] * self.vectors[:, 1]
+                  - to_starts[:, :, 1] * self.vectors[:, 0]) / denoms
+            us = (to_starts[:, :, 0] * directions[:, 1:]
+                  - to_starts[:, :, 1] * directions[:, :1]) / denoms
+        hits = (denoms != 0) & (ts > 0) & (us >= 0) & (us <= 1)
+        ts[~hits] = np.inf
+        if not ts.shape[1]:
+            return np.full(len(origins), np.inf)
+        return ts.min(axis=1)
+
+    def __cast_grid(self, origins, directions, rays, distances):
+        """Walk every ray through the grid cells in lockstep (the same as
+        `WallGrid.traverse`) and keep the closest ray parameters in
+        `distances`. Only the walls in the passed cells are intersected."""
+        grid = self.grid
+        origins, directions = origins[rays], directions[rays]
+        cells = np.floor((origins - grid.origin) / grid.cell_size).astype(int)
+        steps = np.where(directions > 0, 1, -1)
+        borders = grid.origin + (cells + (directions > 0)) * grid.cell_size
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t_maxs = np.where(directions != 0,
+                              (borders - origins) / directions, np.inf)
+            t_deltas = np.where(directions != 0,
+                                grid.cell_size / np.abs(directions), np.inf)
+
+        while len(rays):
+            rows = np.arange(len(rays))
+            axes = (t_maxs[:, 0] >= t_maxs[:, 1]).astype(int)
+            t_exits = t_maxs[rows, axes]
+            owners, idx = grid.walls_of(cells[:, 0] * grid.shape[1]
+                                        + cells[:, 1])
+            if len(idx):
+                np.minimum.at(distances, rays[owners], self.__intersect(
+                    origins[owners], directions[owners].T, idx))
+            cells[rows, axes] += steps[rows, axes]
+            t_maxs[rows, axes] += t_deltas[rows, axes]
+            # the walls in the cells after this one are farther
+            running = (distances[rays] >= t_exits) & \
+                np.all((cells >= 0) & (cells < grid.shape), axis=1)
+            rays, origins, directions, cells, steps, t_maxs, t_deltas = (
+                rays[running], origins[running], directions[running],
+                cells[running], steps[running], t_maxs[running],
+                t_deltas[running])
+
+    def point_dists(self, pt, idx=slice(None)):
+        """Get the distances between a point and every wall at once.
+
+        Args:
+            pt (tuple): the target point, or the target points in shape
+                (len(idx), 2) to measure each of them to its own wall.
+            idx (numpy.ndarray, optional): Defaults to every wall. The indices
+                of the walls to measure.
+
+        Returns:
+            numpy.ndarray: the distances in shape (number of walls,).
+        """
+
+        starts, vectors = self.starts[idx], self.vectors[idx]
+        to_pt = np.asarray(pt, dtype=float) - starts
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ts = (to_pt * vectors).sum(axis=1) / self.sq_lengths[idx]
+        # the walls with zero length are measured from their start points
+        ts = np.clip(np.nan_to_num(ts), 0, 1)
+        diffs = to_pt - ts[:, np.newaxis] * vectors
+        return np.sqrt((diffs**2).sum(axis=1))
+
+    def point_dists_batch(self, pts):
+        """Get the distances between many points and every wall at once.
+
+        Args:
+            pts (numpy.ndarray): the target points in shape (npoint, 2).
+
+        Returns:
+            numpy.ndarray: the distances in shape (npoint, number of walls).
+        """
+
+        to_pts = np.asarray(pts, dtype=float).reshape(-1, 1, 2) - self.starts
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ts = (to_pts * self.vectors).sum(axis=2) / self.sq_lengths
+        # the walls with zero length are measured from their start points
+        ts = np.clip(np.nan_to_num(ts), 0, 1)
+        diffs = to_pts - ts[:, :, np.newaxis] * self.vectors
+        return np.sqrt((diffs**2).sum(axis=2))
+
+    def collided(self, pt, radius):
+        """Get the wall collided by a circle.
+
+        Args:
+            pt (tuple): the center of the circle.
+            radius (float): the radius of the circle.
+
+        Returns:
+            int: the index of the closest wall within `radius`, or None if the
+            circle collides no wall.
+        """
+
+        if self.grid is not None:
+            # only the walls around the circle can be within `radius`
+            candidates = self.grid.query(pt, radius)
+            if not len(candidates):
+                return None
+        else:
+            candidates = np.arange(len(self))
+        dists = self.point_dists(pt, candidates)
+        idx = int(np.argmin(dists))
+        if dists[idx] <= radius:
+            return int(candidates[idx])
+        return None
+
+    def collided_batch(self, pts, radius):
+        """Get the walls collided by many circles with the same radius.
+
+        Args:
+            pts (numpy.ndarray): the centers of the circles in shape
+                (npoint, 2).
+            radius (float): the radius of the circles.
+
+        Returns:
+            numpy.ndarray: the index of the closest wall within `radius` for
+            every circle, or -1 if the circle collides no wall.
+        """
+
+        pts = np.asarray(pts, dtype=float).reshape(-1, 2)
+        if self.grid is not None:
+            # only the walls around the circles can be within `radius`, unless
+            # the circles cover so many cells that measuring to every wall is
+            # cheaper
+            pairs = self.grid.query_batch(pts, radius,
+                                          max_pairs=len(pts) * len(self))
+        if self.grid is None or pairs is None:
+            dists = self.point_dists_batch(pts)
+            idx = dists.argmin(axis=1)
+            idx[dists[np.arange(len(dists)), idx] > radius] = -1
+            return idx
+
+        owners, candidates = pairs
+        dists = self.point_dists(pts[owners], candidates)
+        hits = dists <= radius
+        owners, candidates, dists = owners[hits], candidates[hits], dists[hits]
+        # the closest wall of every circle, the smallest index on ties
+        order = np.lexsort((candidates, dists, owners))
+        owners, candidates = owners[order], candidates[order]
+        first = np.unique(owners, return_index=True)[1]
+        idx = np.full(len(pts), -1)
+        idx[owners[first]] = candidates[first]
+        return idx
+
+
+class WallGrid(object):
+    def __init__(self, walls, cell_size=None):
+        """The uniform grid indexing the walls by the cells they pass, so the
+        queries only touch the walls nearby. A wall is registered in every
+        cell overlapping its bounding box.
+
+        Args:
+            walls (Walls): the walls to index.
+            cell_size (float, optional): Defaults to None. The side length of
+                the cells. If None, it is chosen so that there are about four
+                walls for each cell area.
+        """
+
+        lower = np.minimum(walls.starts, walls.ends)
+        upper = np.maximum(walls.starts, walls.ends)
+        self.origin = lower.min(axis=0)
+        extent = upper.max(axis=0) - self.origin
+        if cell_size is None:
+            cell_size = 2 * math.sqrt(float(np.prod(extent)) / len(walls.starts))
+            if cell_size == 0:
+                # every wall is on the same horizontal or vertical line
+                cell_size = float(extent.max()) / math.sqrt(len(walls.starts))
+        self.cell_size = max(cell_size, float(extent.max()) * 1e-6, 1e-9)
+        self.shape = (np.floor(extent / self.cell_size).astype(int) + 1)
+
+        # pad the bounding boxes so the walls on the cell borders are
+        # registered in the cells on both sides
+        pad = self.cell_size * 1e-9
+        lower_cells = self.__cells(lower - pad)
+        spans = self.__cells(upper + pad) - lower_cells + 1
+        # every (cell, wall) pair of the bounding boxes, in the order of walls
+        counts = spans.prod(axis=1)
+        walls_idx = np.repeat(np.arange(len(counts)), counts)
+        within = np.arange(len(walls_idx)) - np.repeat(
+            np.cumsum(counts) - counts, counts)
+        xs = lower_cells[walls_idx, 0] + within // spans[walls_idx, 1]
+        ys = lower_cells[walls_idx, 1] + within % spans[walls_idx, 1]
+        cells = xs * self.shape[1] + ys
+        order = np.argsort(cells, kind='stable')
+        # the walls of cell i are cell_walls[cell_offsets[i]:cell_offsets[i
+        # + 1]], in ascending order
+        self.cell_walls = walls_idx[order]
+        self.cell_offsets = np.zeros(self.shape[0] * self.shape[1] + 1,
+                                     dtype=int)
+        np.cumsum(np.bincount(cells, minlength=len(self.cell_offsets) - 1),
+                  out=self.cell_offsets[1:])
+        self.__split_cells()
+
+    @classmethod
+    def from_arrays(cls, origin, cell_size, shape, cell_offsets, cell_walls):
+        """Rebuild the grid from the arrays of `to_arrays`."""
+        grid = cls.__new__(cls)
+        grid.origin = np.asarray(origin, dtype=float)
+        grid.cell_size = float(cell_size)
+        grid.shape = np.asarray(shape, dtype=int)
+        grid.cell_offsets = np.asarray(cell_offsets, dtype=int)
+        grid.cell_walls = np.asarray(cell_walls, dtype=int)
+        grid.__split_cells()
+        return grid
+
+    def to_arrays(self):
+        """Get the arrays rebuilding the grid by `from_arrays`.
+
+        Returns:
+            dict: origin, cell_size, shape, cell_offsets and cell_walls.
+        """
+
+        return {
+            'origin': self.origin,
+            'cell_size': self.cell_size,
+            'shape': self.shape,
+            'cell_offsets': self.cell_offsets,
+            'cell_walls': self.cell_walls
+        }
+
+    def __split_cells(self):
+        # the walls of every cell as views for the single queries
+        self.cells = np.split(self.cell_walls, self.cell_offsets[1:-1])
+
+    def __cells(self, pts):
+        """Get the cell coordinates of the points clipped in the grid."""
+        return np.clip(np.floor((pts - self.origin) / self.cell_size)
+                       .astype(int), 0, self.shape - 1)
+
+    def contains(self, pt):
+        """Check if the point is in the grid."""
+        offset = (np.asarray(pt, dtype=float) - self.origin) / self.cell_size
+        return bool(np.all((offset >= 0) & (offset < self.shape)))
+
+    def contains_batch(self, pts):
+        """Get the mask of the points in the grid."""
+        offset = (np.asarray(pts, dtype=float).reshape(-1, 2)
+                  - self.origin) / self.cell_size
+        return np.all((offset >= 0) & (offset < self.shape), axis=1)
+
+    def walls_of(self, cells):
+        """Get the walls in many cells at once.
+
+        Args:
+            cells (numpy.ndarray): the flat indices of the cells.
+
+        Returns:
+            tuple: (owners, walls). `walls[i]` is in the cell
+            `cells[owners[i]]`.
+        """
+
+        firsts = self.cell_offsets[cells]
+        counts = self.cell_offsets[np.asarray(cells) + 1] - firsts
+        owners = np.repeat(np.arange(len(counts)), counts)
+        # the position of every wall within its cell
+        within = np.arange(len(owners)) - np.repeat(np.cumsum(counts) - counts,
+                                                    counts)
+        return owners, self.cell_walls[firsts[owners] + within]
+
+    def query_batch(self, pts, radius, max_pairs=None):
+        """Get the walls which may be within `radius` from many points.
+        A wall may be given more than once for a point.
+
+        Args:
+            pts (numpy.ndarray): the target points in shape (npoint, 2).
+            radius (float): the search radius.
+            max_pairs (int, optional): Defaults to None. Give up if there are
+                more than this number of (point, wall) pairs.
+
+        Returns:
+            tuple: (owners, walls). `walls[i]` may be within `radius` from
+            `pts[owners[i]]`. None if there are more than `max_pairs` pairs.
+        """
+
+        pts = np.asarray(pts, dtype=float).reshape(-1, 2)
+        if not len(pts):
+            return np.array([], dtype=int), np.array([], dtype=int)
+        # the points out of the grid are searched in the border cells, which
+        # is a superset of the walls within `radius`
+        lo, up = self.__cells(pts - radius), self.__cells(pts + radius)
+        spans = (up - lo).max(axis=0) + 1
+        points, cells = [], []
+        for dx in range(spans[0]):
+            for dy in range(spans[1]):
+                xs, ys = lo[:, 0] + dx, lo[:, 1] + dy
+                valid = np.flatnonzero((xs <= up[:, 0]) & (ys <= up[:, 1]))
+                points.append(valid)
+                cells.append(xs[valid] * self.shape[1] + ys[valid])
+        points, cells = np.concatenate(points), np.concatenate(cells)
+        if max_pairs is not None and (self.cell_offsets[cells + 1]
+                                      - self.cell_offsets[cells]).sum() \
+                > max_pairs:
+            return None
+        owners, walls = self.walls_of(cells)
+        return points[owners], walls
+
+    def query(self, pt, radius):
+        """Get the indices of the walls which may be within `radius` from the
+        point.
+
+        Args:
+            pt (tuple): the target point.
+            radius (float): the search radius.
+
+        Returns:
+            numpy.ndarray: the sorted indices of the walls.
+        """
+
+        pt = np.asarray(pt, dtype=float)
+        if (np.any(pt + radius < self.origin)
+                or np.any(pt - radius >= self.origin
+                          + self.shape * self.cell_size)):
+            return np.array([], dtype=int)
+        lo, up = self.__cells(np.array((pt - radius, pt + radius)))
+        return np.unique(np.concatenate(
+            [self.cells[x * self.shape[1] + y]
+             for x in range(lo[0], up[0] + 1)
+             for y in range(lo[1], up[1] + 1)]))
+
+    def traverse(self, origin, direction):
+        """Walk through the cells passed by a ray in order (Amanatides & Woo).
+
+        Args:
+            origin (tuple): the (x, y) start point of the ray in the grid.
+            direction (tuple): the unit direction of the ray.
+
+        Yields:
+            tuple: (the indices of the walls in the cell, the ray parameter
+            where the ray leaves the cell).
+        """
+
+        cell = [int(c) for c in np.floor(
+            (np.asarray(origin, dtype=float) - self.origin) / self.cell_size)]
+        steps, t_maxs, t_deltas = [], [], []
+        for axis in range(2):
+            if direction[axis] > 0:
+                steps.append(1)
+                border = self.origin[axis] + (cell[axis] + 1) * self.cell_size
+            else:
+                steps.append(-1)
+                border = self.origin[axis] + cell[axis] * self.cell_size
+            if direction[axis] == 0:
+                t_maxs.append(math.inf)
+                t_deltas.append(math.inf)
+            else:
+                t_maxs.append((border - origin[axis]) / direction[axis])
+                t_deltas.append(self.cell_size / abs(direction[axis]))
+
+        while (0 <= cell[0] < self.shape[0]
+               and 0 <= cell[1] < self.shape[1]):
+            axis = 0 if t_maxs[0] < t_maxs[1] else 1
+            yield self.cells[cell[0] * self.shape[1] + cell[1]], t_maxs[axis]
+            cell[axis] += steps[axis]
+            t_maxs[axis] += t_deltas[axis]
@@ -0,0 +1,89 @@
+"""
+Define the long-lived worker pool which evaluates the fitting function on
+multiple cores. The fitting function is sent to every worker only once at
+startup, and then only the positions and the errors travel between processes.
+"""
+
+import multiprocessing as mp
+
+import numpy as np
+
+# the fitting function of current worker process
+_fitness = None
+
+
+def _init_worker(fitness):
+    global _fitness
+    _fitness = fitness
+
+
+def _get_errors(positions):
+    """ This function is designed for multiprocessing.Pool() """
+    return _fitness.errors(positions)
+
+
+class FitnessPool(object):
+
+    def __init__(self, fitness, processes=None):
+        """A pool of worker processes sharing the same fitting function.
+
+        Arguments:
+            fitness {DatasetFitness} -- The fitting function with method
+                `errors(positions)`. It must be picklable.
+
+        Keyword Arguments:
+            processes {int} -- The number of worker processes. Use the number
+                of CPUs if None. (default: {None})
+        """
+
+        self.fitness = fitness
+        self.processes = processes or mp.cpu_count()
+        self.__pool = mp.Pool(self.processes, initializer=_init_worker,
+                              initargs=(fitness,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def errors(self, positions):
+        """Get the errors of every position on the workers.
+
+        Arguments:
+            positions {numpy.ndarray} -- The parameters in shape
+                (nparticle, ndim).
+
+        Returns:
+            numpy.ndarray -- The errors in shape (nparticle,).
+        """
+
+        chunks = np.array_split(positions, min(self.processes,
+                                               len(positions)))
+        return np.concatenate(self.__pool.map(_get_errors, chunks))
+
+    def submit(self, key, positions, results):
+        """Evaluate the positions without waiting. The `(key, errors)` is put
+        into `results` as soon as the worker returns, in the order of
+        finishing instead of submitting.
+
+        Arguments:
+            key {object} -- The identifier of the task, e.g. the indices of
+                the particles.
+            positions {numpy.ndarray} -- The parameters in shape
+                (nparticle, ndim).
+            results {queue.Queue} -- The queue of the finished tasks. If the
+                fitting function raised, the exception is put as the errors.
+        """
+
+        self.__pool.apply_async(
+            _get_errors, (positions,),
+            callback=lambda errs: results.put((key, errs)),
+            error_callback=lambda err: results.put((key, err)))
+
+    def close(self):
+        """Wait for the workers to finish their tasks and shut them down."""
+        if self.__pool is not None:
+            self.__pool.close()
+            self.__pool.join()
+            self.__pool = None
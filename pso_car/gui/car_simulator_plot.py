@@ -4,17 +4,27 @@ import matplotlib.style
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 from matplotlib.lines import Line2D
-from matplotlib.patches import Circle, Rectangle
+from matplotlib.patches import Circle, Polygon, Rectangle
 
+from PySide2.QtCore import QTimer
 from PySide2.QtWidgets import QSizePolicy
 
 # matplotlib.style.use('dark_background')
 
 
 class CarSimulatorPlot(FigureCanvas):
-    """Ultimately, this is a QWidget (as well as a FigureCanvasAgg, etc.)."""
+    """Ultimately, this is a QWidget (as well as a FigureCanvasAgg, etc.).
+
+    The map and the path are drawn once as the background, and the car, its
+    direction and the radars are persistent animated artists which are only
+    updated and blitted onto the cached background, at most once per pass of
+    the event loop.
+    """
 
     car_radius = 3
+    arrow_len = 5
+    arrow_head_width = 2
+    arrow_head_len = 3
 
     def __init__(self):
         fig = Figure(figsize=(3, 3), dpi=100)
@@ -29,10 +39,28 @@ class CarSimulatorPlot(FigureCanvas):
                                    QSizePolicy.Expanding)
         FigureCanvas.updateGeometry(self)
 
-        self.__car = None
-        self.__direction = None
-        self.__dists = []
-        self.__paths = []
+        self.__background = None
+        self.__blit_pending = False
+        self.__set_artists()
+        self.mpl_connect('draw_event', self.__on_draw)
+
+    def __set_artists(self):
+        """Create the animated artists, which are not drawn in background."""
+        self.__car = Circle((0, 0), radius=self.car_radius,
+                            color='dodgerblue', zorder=4, animated=True,
+                            visible=False)
+        self.axes.add_artist(self.__car)
+        self.__direction = Polygon([(0, 0)] * 3, closed=True, zorder=5,
+                                   fc='seagreen', ec='darkslategray',
+                                   animated=True, visible=False)
+        self.axes.add_artist(self.__direction)
+        self.__dists = [Line2D([], [], linestyle=':', color='grey',
+                               animated=True, visible=False)
+                        for _ in range(3)]
+        for dist in self.__dists:
+            self.axes.add_line(dist)
+        self.__animated_artists = [*self.__dists, self.__car,
+                                   self.__direction]
 
     def paint_map(self, data):
         self.axes.cla()
@@ -42,48 +70,73 @@ class CarSimulatorPlot(FigureCanvas):
             data['end_area_rb'][0] - data['end_area_lt'][0],
             data['end_area_lt'][1] - data['end_area_rb'][1],
             color='greenyellow'))
+        self.__set_artists()
+        self.__background = None
+        self.draw_idle()
 
     def paint_car(self, pos, angle):
-        try:
-            self.__car.remove()
-            self.__direction.remove()
-        except (AttributeError, ValueError):
-            pass
-        self.__car = Circle(pos, radius=self.car_radius,
-                            color='dodgerblue', zorder=4)
-        self.axes.add_artist(self.__car)
+        self.__car.center = pos
+        self.__car.set_color('dodgerblue')
+        self.__car.set_visible(True)
 
-        arrow_len = 5
         angle = math.radians(angle)
-        self.__direction = self.axes.arrow(*pos,
-                                           arrow_len * math.cos(angle),
-                                           arrow_len * math.sin(angle),
-                                           head_width=2, zorder=5,
-                                           length_includes_head=True,
-                                           fc='seagreen', ec='darkslategray')
-        self.draw()
+        self.__direction.set_xy(self.__arrow(pos, angle))
+        self.__direction.set_visible(True)
+        self.__request_blit()
+
+    def __arrow(self, pos, angle):
+        """Get the vertices of the direction arrow."""
+        cos, sin = math.cos(angle), math.sin(angle)
+        tip = (pos[0] + self.arrow_len * cos, pos[1] + self.arrow_len * sin)
+        base_len = self.arrow_len - self.arrow_head_len
+        base = (pos[0] + base_len * cos, pos[1] + base_len * sin)
+        half = self.arrow_head_width / 2
+        return [pos, base,
+                (base[0] - half * sin, base[1] + half * cos), tip,
+                (base[0] + half * sin, base[1] - half * cos), base]
 
     def paint_car_collided(self):
         self.__car.set_color('tomato')
-        self.draw()
+        self.__request_blit()
 
     def paint_dist(self, pos, intersections):
-        for dist in self.__dists:
-            try:
-                dist.remove()
-            except ValueError:
-                pass
-
-        self.__dists = [Line2D(*zip(pos, i),
-                               linestyle=':',
-                               color='grey') for i in intersections if i is not None]
-        for dist in self.__dists:
-            self.axes.add_line(dist)
-        self.draw()
+        for dist, i in zip(self.__dists, intersections):
+            if i is None:
+                dist.set_visible(False)
+            else:
+                dist.set_data(*zip(pos, i))
+                dist.set_visible(True)
+        self.__request_blit()
 
     def paint_path(self, xdata, ydata):
-        self.__paths = Line2D(xdata, ydata,
-                              lw=self.car_radius * 2, solid_capstyle='round',
-                              color='gold')
-        self.axes.add_line(self.__paths)
-        self.draw()
+        self.axes.add_line(Line2D(xdata, ydata,
+                                  lw=self.car_radius * 2,
+                                  solid_capstyle='round', color='gold'))
+        # the path becomes a part of the background
+        self.__background = None
+        self.draw_idle()
+
+    def __request_blit(self):
+        """Blit once after every update in current pass of the event loop."""
+        if not self.__blit_pending:
+            self.__blit_pending = True
+            QTimer.singleShot(0, self.__blit)
+
+    def __blit(self):
+        self.__blit_pending = False
+        if self.__background is None:
+            self.draw_idle()
+            return
+        self.restore_region(self.__background)
+        self.__draw_animated()
+        self.blit(self.axes.bbox)
+
+    def __on_draw(self, event):
+        """Cache the background after every full draw, e.g. resizing."""
+        self.__background = self.copy_from_bbox(self.axes.bbox)
+        self.__draw_animated()
+
+    def __draw_animated(self):
+        for artist in self.__animated_artists:
+            if artist.get_visible():
+                self.axes.draw_artist(artist)
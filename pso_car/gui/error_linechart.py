@@ -1,55 +1,53 @@
+import collections
+
+import numpy as np
+from PySide2.QtCore import QPointF
 from PySide2.QtGui import QPainter
 from PySide2.QtWidgets import QVBoxLayout, QFrame
 from PySide2.QtCharts import QtCharts
 
+
 class ErrorLineChart(QFrame):
 
-    def __init__(self, nseries=1, series_names=None):
+    def __init__(self, nseries=1, series_names=None, window=100,
+                 max_points=1000):
+        """The line chart of errors.
+
+        Args:
+            nseries (int, optional): Defaults to 1. The number of series.
+            series_names (tuple of str, optional): Defaults to None. The names
+                of the series shown in legend.
+            window (int, optional): Defaults to 100. Only show the last
+                `window` points of each series. If None, show the whole
+                history downsampled to about `max_points` points.
+            max_points (int, optional): Defaults to 1000. The upper bound of
+                the points of each series while showing the whole history.
+        """
+
         super().__init__()
         if nseries < 1:
             raise ValueError('The number of serieses must be larger than zero.')
         self.nseries = nseries
         self.series_names = series_names
+        self.window = window
+        self.max_points = max_points
         layout = QVBoxLayout()
         layout.setContentsMargins(0, 0, 0, 0)
         self.setLayout(layout)
         self.setMinimumHeight(110)
         self.setMinimumWidth(400)
 
-        self.serieses = [QtCharts.QLineSeries() for _ in range(self.nseries)]
         self.chart = QtCharts.QChart()
         if self.series_names is None:
             self.chart.legend().hide()
-        for idx, series in enumerate(self.serieses):
-            self.chart.addSeries(series)
-            if self.series_names is not None:
-                series.setName(self.series_names[idx])
-        self.chart.createDefaultAxes()
+        self.__set_serieses()
         self.chart.layout().setContentsMargins(0, 0, 0, 0)
         # self.chart.setTheme(QChart.ChartThemeDark)
-        self.chart.axisY().setTickCount(3)
         chart_view = QtCharts.QChartView(self.chart)
         chart_view.setRenderHint(QPainter.Antialiasing)
         layout.addWidget(chart_view)
 
-        self.x_max = 2
-        self.y_pts = list()
-
-    def append_point(self, x, y, series_idx=0):
-        self.serieses[series_idx].append(x, y)
-        self.x_max = max(x, self.x_max)
-        self.y_pts.append(y)
-        if self.x_max > 100:
-            self.chart.axisX().setRange(self.x_max - 100, self.x_max)
-            y_max = max(self.y_pts[-100:])
-            self.serieses[series_idx].remove(float(self.x_max - 100), self.y_pts[self.x_max - 101])
-        else:
-            self.chart.axisX().setRange(1, self.x_max)
-            y_max = max(self.y_pts)
-        self.chart.axisY().setRange(0, y_max + y_max / 5)
-
-    def clear(self):
-        self.chart.removeAllSeries()
+    def __set_serieses(self):
         self.serieses = [QtCharts.QLineSeries() for _ in range(self.nseries)]
         for idx, series in enumerate(self.serieses):
             self.chart.addSeries(series)
@@ -57,5 +55,171 @@ class ErrorLineChart(QFrame):
                 series.setName(self.series_names[idx])
         self.chart.createDefaultAxes()
         self.chart.axisY().setTickCount(3)
-        self.x_max = 2
-        self.y_pts = list()
+        if self.window is None:
+            self.buffers = [MinMaxDecimator(self.max_points)
+                            for _ in range(self.nseries)]
+        else:
+            self.buffers = [RingBuffer(self.window)
+                            for _ in range(self.nseries)]
+
+    def append_point(self, x, y, series_idx=0):
+        self.append_points((x,), (y,), series_idx)
+
+    def append_points(self, xs, ys, series_idx=0):
+        """Append a batch of points to a series and redraw it once.
+
+        Args:
+            xs (list of floats): The x of the points in increasing order.
+            ys (list of floats): The y of the points.
+            series_idx (int, optional): Defaults to 0. The index of the
+                series.
+        """
+
+        if not len(xs):
+            return
+        buffer = self.buffers[series_idx]
+        buffer.extend(xs, ys)
+        self.serieses[series_idx].replace(
+            [QPointF(x, y) for x, y in zip(*buffer.points())])
+
+        x_min = min(b.x_range[0] for b in self.buffers if len(b))
+        x_max = max(b.x_range[1] for b in self.buffers if len(b))
+        self.chart.axisX().setRange(x_min, max(x_max, x_min + 1))
+        y_max = max(b.max for b in self.buffers if len(b))
+        self.chart.axisY().setRange(0, y_max + y_max / 5)
+
+    def clear(self):
+        self.chart.removeAllSeries()
+        self.__set_serieses()
+
+
+class RingBuffer(object):
+
+    def __init__(self, capacity):
+        """The fixed-size buffer of the last `capacity` points with the
+        running maximum of y.
+
+        Args:
+            capacity (int): The maximum number of points.
+        """
+
+        self.capacity = capacity
+        self.xs = np.empty(capacity)
+        self.ys = np.empty(capacity)
+        self.__end = 0  # the total number of appended points
+        # the (sequence number, y) of the candidates of the maximum, in
+        # decreasing order of y
+        self.__maxes = collections.deque()
+
+    def __len__(self):
+        return min(self.__end, self.capacity)
+
+    def extend(self, xs, ys):
+        for x, y in zip(xs, ys):
+            idx = self.__end % self.capacity
+            self.xs[idx], self.ys[idx] = x, y
+            while self.__maxes and self.__maxes[-1][1] <= y:
+                self.__maxes.pop()
+            self.__maxes.append((self.__end, y))
+            self.__end += 1
+            if self.__maxes[0][0] <= self.__end - self.capacity - 1:
+                self.__maxes.popleft()
+
+    @property
+    def max(self):
+        return self.__maxes[0][1]
+
+    @property
+    def x_range(self):
+        xs, _ = self.points()
+        return xs[0], xs[-1]
+
+    def points(self):
+        """Get the points in the order of appending."""
+        if self.__end <= self.capacity:
+            return self.xs[:self.__end], self.ys[:self.__end]
+        start = self.__end % self.capacity
+        return (np.roll(self.xs, -start), np.roll(self.ys, -start))
+
+
+class MinMaxDecimator(object):
+
+    def __init__(self, max_points):
+        """The whole history of points downsampled by min/max decimation. The
+        points are grouped in buckets of the same size, and only the minimum
+        and the maximum of each bucket are kept. The bucket size doubles
+        whenever there are more than `max_points` points to keep, so the
+        memory and the number of points shown are bounded while the extremes
+        are never lost.
+
+        Args:
+            max_points (int): The upper bound of the points to keep.
+        """
+
+        self.max_points = max(max_points, 4)
+        self.bucket_size = 1
+        # the (x, y) of the minimum and the maximum of every full bucket
+        self.__buckets = np.empty((0, 4))
+        # the same of the bucket not yet full and its number of points
+        self.__pending = None
+        self.__npending = 0
+        self.__count = 0
+        self.x_range = None
+        self.max = -np.inf
+
+    def __len__(self):
+        return self.__count
+
+    def extend(self, xs, ys):
+        for x, y in zip(xs, ys):
+            self.__add_pending((x, y, x, y), 1)
+            if self.__npending >= self.bucket_size:
+                self.__buckets = np.vstack((self.__buckets, self.__pending))
+                self.__pending, self.__npending = None, 0
+        self.__count += len(xs)
+        self.x_range = (xs[0] if self.x_range is None else self.x_range[0],
+                        xs[-1])
+        self.max = max(self.max, max(ys))
+        while 2 * (len(self.__buckets) + 1) > self.max_points:
+            self.__merge()
+
+    def __add_pending(self, bucket, npoint):
+        if self.__pending is None:
+            self.__pending = tuple(bucket)
+        else:
+            low = bucket[:2] if bucket[1] < self.__pending[1] \
+                else self.__pending[:2]
+            high = bucket[2:] if bucket[3] > self.__pending[3] \
+                else self.__pending[2:]
+            self.__pending = tuple(low) + tuple(high)
+        self.__npending += npoint
+
+    def __merge(self):
+        """Merge every two adjacent buckets and double the bucket size."""
+        if len(self.__buckets) % 2:
+            # the last bucket goes back to pending to keep the size aligned
+            pending, npending = self.__pending, self.__npending
+            self.__pending, self.__npending = None, 0
+            self.__add_pending(self.__buckets[-1], self.bucket_size)
+            if pending is not None:
+                self.__add_pending(pending, npending)
+            self.__buckets = self.__buckets[:-1]
+        pairs = self.__buckets.reshape(-1, 2, 4)
+        lows = np.where(pairs[:, 0, 1] <= pairs[:, 1, 1], 0, 1)
+        highs = np.where(pairs[:, 0, 3] >= pairs[:, 1, 3], 0, 1)
+        rows = np.arange(len(pairs))
+        self.__buckets = np.hstack((pairs[rows, lows, :2],
+                                    pairs[rows, highs, 2:]))
+        self.bucket_size *= 2
+
+    def points(self):
+        """Get the kept points in increasing order of x."""
+        buckets = self.__buckets
+        if self.__pending is not None:
+            buckets = np.vstack((buckets, self.__pending))
+        pts = np.vstack((buckets[:, :2], buckets[:, 2:]))
+        pts = pts[np.argsort(pts[:, 0], kind='stable')]
+        # drop the duplicated points of the buckets with only one point
+        keep = np.ones(len(pts), dtype=bool)
+        keep[1:] = np.any(pts[1:] != pts[:-1], axis=1)
+        return pts[keep, 0], pts[keep, 1]
@@ -1,22 +1,39 @@
 """ Define the contents of testing panel. """
 
-from PySide2.QtCore import Qt, Slot
+import math
+
+from PySide2.QtCore import Qt, QTimer, Slot
 from PySide2.QtWidgets import (QHBoxLayout, QFormLayout, QGroupBox, QComboBox,
-                               QPushButton, QLabel, QTextEdit, QSpinBox)
+                               QPushButton, QLabel, QTextEdit, QSpinBox,
+                               QDoubleSpinBox, QFileDialog, QCheckBox)
 
 from .panel import Panel
 from .car_simulator_plot import CarSimulatorPlot
 from ..backend.car import Car
+from ..backend.lookup import LookupTable, lookup_error_report
+from ..backend.model import read_model, write_model
 from ..backend.run import RunCar
 from ..backend.rbfn import RBFN
 
 
 class TestingPanel(Panel):
 
+    # the replaying speeds of `RunCar`
+    speeds = {
+        'Every Step': None,
+        '1x': 1,
+        '2x': 2,
+        '5x': 5,
+        '10x': 10,
+        'Full Speed': math.inf
+    }
+
     def __init__(self, maps, threads):
         super().__init__()
         self.maps = maps
         self.rbfn = None
+        # the training dataset to report the errors of the lookup table on
+        self.reference_data = None
         self.threads = threads
 
         self.__set_execution_ui()
@@ -44,18 +61,68 @@ class TestingPanel(Panel):
         self.stop_btn.setStatusTip('Force the testing stop running.')
         self.stop_btn.setDisabled(True)
 
+        self.save_btn = QPushButton('Save Model')
+        self.save_btn.setStatusTip('Save the RBFN model into a model file. '
+                                   '(available after training)')
+        self.save_btn.setDisabled(True)
+        self.save_btn.clicked.connect(self.__save_model)
+
+        self.load_btn = QPushButton('Load Model')
+        self.load_btn.setStatusTip('Load the RBFN model from a model file.')
+        self.load_btn.clicked.connect(self.__load_model)
+
         self.fps = QSpinBox()
         self.fps.setMinimum(1)
-        self.fps.setMaximum(60)
+        self.fps.setMaximum(240)
         self.fps.setValue(20)
-        self.fps.setStatusTip("The re-drawing rate for car simulator. High fps "
-                              "may cause the plot shows discontinuously.")
+        self.fps.setStatusTip("The re-drawing rate for car simulator, and the "
+                              "number of steps per second at 1x speed.")
+
+        self.speed_selector = QComboBox()
+        self.speed_selector.addItems(list(self.speeds.keys()))
+        self.speed_selector.setStatusTip(
+            "The speed of replaying. Draw every step, or replay faster and "
+            "only draw the latest step at the re-drawing rate.")
+
+        self.lookup_cb = QCheckBox('Lookup Table')
+        self.lookup_cb.setStatusTip('Drive the car by the RBFN sampled on a '
+                                    'grid of the radar distances with '
+                                    'trilinear interpolation.')
+
+        self.lookup_resolution = QSpinBox()
+        self.lookup_resolution.setRange(2, 257)
+        self.lookup_resolution.setValue(33)
+        self.lookup_resolution.setStatusTip('The number of grid points of the '
+                                            'lookup table in each dimension.')
+
+        # the range of every radar distance covered by the lookup table, set
+        # to the input range of the model when it is loaded
+        self.lookup_min = QDoubleSpinBox()
+        self.lookup_max = QDoubleSpinBox()
+        for spin_box in (self.lookup_min, self.lookup_max):
+            spin_box.setRange(0, 10000)
+            spin_box.setStatusTip('The range of the radar distances covered '
+                                  'by the lookup table. The distances out of '
+                                  'it are clamped.')
+        self.lookup_max.setValue(40)
+
+        self.__render_timer = QTimer(self)
+        self.__render_timer.timeout.connect(self.__render_latest)
 
         inner_layout.addWidget(self.map_selector, 1)
         inner_layout.addWidget(QLabel("FPS:"))
         inner_layout.addWidget(self.fps)
+        inner_layout.addWidget(QLabel("Speed:"))
+        inner_layout.addWidget(self.speed_selector)
+        inner_layout.addWidget(self.lookup_cb)
+        inner_layout.addWidget(self.lookup_resolution)
+        inner_layout.addWidget(self.lookup_min)
+        inner_layout.addWidget(QLabel('-'))
+        inner_layout.addWidget(self.lookup_max)
         inner_layout.addWidget(self.start_btn)
         inner_layout.addWidget(self.stop_btn)
+        inner_layout.addWidget(self.save_btn)
+        inner_layout.addWidget(self.load_btn)
 
         self._layout.addWidget(group_box)
 
@@ -104,14 +171,29 @@ class TestingPanel(Panel):
     def __init_widgets(self):
         self.start_btn.setDisabled(True)
         self.stop_btn.setEnabled(True)
+        self.load_btn.setDisabled(True)
         self.fps.setDisabled(True)
+        self.speed_selector.setDisabled(True)
+        self.lookup_cb.setDisabled(True)
+        self.lookup_resolution.setDisabled(True)
+        self.lookup_min.setDisabled(True)
+        self.lookup_max.setDisabled(True)
         self.map_selector.setDisabled(True)
+        self.__rendered = -1
+        if self.__thread.speed is not None:
+            self.__render_timer.start(1000 // self.fps.value())
 
     @Slot()
     def __reset_widgets(self):
         self.start_btn.setEnabled(True)
         self.stop_btn.setDisabled(True)
+        self.load_btn.setEnabled(True)
         self.fps.setEnabled(True)
+        self.speed_selector.setEnabled(True)
+        self.lookup_cb.setEnabled(True)
+        self.lookup_resolution.setEnabled(True)
+        self.lookup_min.setEnabled(True)
+        self.lookup_max.setEnabled(True)
         self.map_selector.setEnabled(True)
 
     @Slot(str)
@@ -127,8 +209,23 @@ class TestingPanel(Panel):
 
     @Slot()
     def __show_car_collided(self):
+        if self.__render_timer.isActive():
+            # show the last step before marking the collision
+            self.__render_latest()
         self.simulator.paint_car_collided()
 
+    @Slot()
+    def __render_latest(self):
+        """Draw the latest step replayed by the thread, dropping the steps
+        between two refreshes."""
+        latest = self.__thread.latest_state()
+        if latest is None or latest[0] == self.__rendered:
+            return
+        self.__rendered = latest[0]
+        pos, angle, wheel_angle, intersections, dists = latest[1]
+        self.__move_car(pos, angle, wheel_angle)
+        self.__show_dists(pos, intersections, dists)
+
     def __show_path(self, xdata, ydata):
         self.simulator.paint_path(xdata, ydata)
 
@@ -137,7 +234,7 @@ class TestingPanel(Panel):
         self.__current_map = self.maps[self.map_selector.currentText()]
         self.__car = Car(self.__current_map['start_pos'],
                          self.__current_map['start_angle'],
-                         3, self.__current_map['route_edge'])
+                         3, self.__current_map['compiled'].walls)
         self.simulator.paint_map(self.__current_map)
         self.__move_car(self.__current_map['start_pos'],
                         self.__current_map['start_angle'])
@@ -154,8 +251,43 @@ class TestingPanel(Panel):
     @Slot(RBFN)
     def load_rbfn(self, rbfn):
         self.rbfn = rbfn
+        self.lookup_min.setValue(rbfn.mean_range[0])
+        self.lookup_max.setValue(rbfn.mean_range[1])
         self.print_console('New RBFN model has been loaded.')
         self.start_btn.setEnabled(True)
+        self.save_btn.setEnabled(True)
+
+    @Slot()
+    def __save_model(self):
+        filepath, _ = QFileDialog.getSaveFileName(
+            self, 'Save Model', 'model.rbfn',
+            'RBFN Model (*.rbfn);;All Files (*)')
+        if not filepath:
+            return
+        try:
+            write_model(filepath, self.rbfn.params, self.rbfn.nneuron,
+                        self.rbfn.mean_range)
+        except (OSError, ValueError) as err:
+            self.print_console('Error: Cannot save the model. {}'.format(err))
+            return
+        self.print_console('The model has been saved to {}.'.format(filepath))
+
+    @Slot()
+    def __load_model(self):
+        filepath, _ = QFileDialog.getOpenFileName(
+            self, 'Load Model', '', 'RBFN Model (*.rbfn);;All Files (*)')
+        if not filepath:
+            return
+        try:
+            model = read_model(filepath)
+        except (OSError, ValueError) as err:
+            self.print_console('Error: Cannot load the model. {}'.format(err))
+            return
+        if model.data_dim != 3:
+            self.print_console('Error: The model takes {} inputs but the car '
+                               'has 3 radars.'.format(model.data_dim))
+            return
+        self.load_rbfn(model)
 
     @Slot()
     def __run(self):
@@ -164,10 +296,16 @@ class TestingPanel(Panel):
         # create a QThread
         if self.rbfn is None:
             raise TypeError('The RBFN model has not yet loaded.')
-        self.__thread = RunCar(self.__car, self.rbfn,
+        model = self.rbfn
+        if self.lookup_cb.isChecked():
+            model = self.__build_lookup_table()
+            if model is None:
+                return
+        self.__thread = RunCar(self.__car, model,
                                (self.__current_map['end_area_lt'],
                                 self.__current_map['end_area_rb']),
-                               self.fps.value())
+                               self.fps.value(),
+                               self.speeds[self.speed_selector.currentText()])
         self.threads.append(self.__thread)
         self.stop_btn.clicked.connect(self.__thread.stop)
         self.__thread.started.connect(self.__init_widgets)
@@ -179,8 +317,32 @@ class TestingPanel(Panel):
         self.__thread.sig_results.connect(self.__get_results)
         self.__thread.start()
 
+    def __build_lookup_table(self):
+        lower, upper = self.lookup_min.value(), self.lookup_max.value()
+        if lower >= upper:
+            self.print_console('Error: The range of the lookup table is '
+                               'empty.')
+            return None
+        table = LookupTable.from_model(self.rbfn,
+                                       self.lookup_resolution.value(),
+                                       ((lower, upper),) * 3)
+        if self.reference_data is not None:
+            report = lookup_error_report(table, self.rbfn,
+                                         self.reference_data[:, :-1],
+                                         self.reference_data[:, -1])
+            self.print_console(
+                'Lookup table errors against the RBFN on the training data: '
+                'MAE {mae:.5f}, max {max_error:.5f}, RMSE {rmse:.5f}, '
+                '{out_of_range:.2%} out of range. (MAE against the expected '
+                'outputs: RBFN {model_mae:.5f}, table {table_mae:.5f})'
+                .format(**report))
+        return table
+
     @Slot(list)
     def __get_results(self, results):
         """Get the results of last running and draw the path of it."""
+        if self.__render_timer.isActive():
+            self.__render_latest()
+            self.__render_timer.stop()
         self.simulator.paint_path([d['x'] for d in results], [
                                   d['y'] for d in results])
@@ -3,13 +3,17 @@
 from PySide2.QtCore import Qt, Slot
 from PySide2.QtWidgets import (QVBoxLayout, QHBoxLayout, QFormLayout, QGroupBox,
                                QComboBox, QSpinBox, QDoubleSpinBox, QLabel,
-                               QProgressBar, QPushButton, QCheckBox)
+                               QProgressBar, QPushButton, QCheckBox,
+                               QLineEdit, QFileDialog)
 
 from .panel import Panel
 from .testing_panel import TestingPanel
 from .error_linechart import ErrorLineChart
 from ..backend.rbfn import RBFN
+from ..backend.engine import EarlyStopping
+from ..backend.islands import TOPOLOGIES
 from ..backend.pso import PSO
+from ..backend.simfitness import SimulationFitness
 
 
 class TrainingPanel(Panel):
@@ -42,6 +46,12 @@ class TrainingPanel(Panel):
         self.start_btn.setStatusTip('Start training.')
         self.start_btn.clicked.connect(self.__run)
 
+        self.resume_btn = QPushButton('Resume')
+        self.resume_btn.setStatusTip('Continue training from a checkpoint '
+                                     'file with the same dataset and '
+                                     'options.')
+        self.resume_btn.clicked.connect(self.__resume)
+
         self.stop_btn = QPushButton('Stop')
         self.stop_btn.setStatusTip('Force the training stop running.')
         self.stop_btn.setDisabled(True)
@@ -51,10 +61,17 @@ class TrainingPanel(Panel):
                                        'fitting for populations.')
         self.multicore_cb.setChecked(True)
 
+        self.async_cb = QCheckBox('Asynchronous')
+        self.async_cb.setStatusTip('Move every particle as soon as its own '
+                                   'fitting returns instead of waiting for '
+                                   'the whole swarm in each iteration.')
+
         inner_layout.addWidget(self.data_selector, 1)
         inner_layout.addWidget(self.start_btn)
+        inner_layout.addWidget(self.resume_btn)
         inner_layout.addWidget(self.stop_btn)
         inner_layout.addWidget(self.multicore_cb)
+        inner_layout.addWidget(self.async_cb)
 
         self._layout.addWidget(group_box)
 
@@ -113,6 +130,82 @@ class TrainingPanel(Panel):
                                  'deviation of each neuron in RBFN (only for '
                                  'initialization).')
 
+        self.fitness_selector = QComboBox()
+        self.fitness_selector.addItems(['Training Dataset',
+                                        'Driving on Every Map'])
+        self.fitness_selector.setStatusTip(
+            'Fit the selected training dataset, or score the RBFN by driving '
+            'the car on every map.')
+
+        self.checkpoint = QLineEdit()
+        self.checkpoint.setPlaceholderText('None')
+        self.checkpoint.setStatusTip('The path of the checkpoint file of the '
+                                     'whole swarm. Do not checkpoint if it '
+                                     'is empty.')
+
+        self.checkpoint_every = QSpinBox()
+        self.checkpoint_every.setRange(1, 1000000)
+        self.checkpoint_every.setValue(100)
+        self.checkpoint_every.setStatusTip('The number of iterations between '
+                                           'two checkpoints.')
+
+        self.target_err = QDoubleSpinBox()
+        self.target_err.setRange(0, 1000)
+        self.target_err.setDecimals(5)
+        self.target_err.setSpecialValueText('Off')
+        self.target_err.setStatusTip('Stop when the total best error reaches '
+                                     'it. (Off if 0)')
+
+        self.stagnation_window = QSpinBox()
+        self.stagnation_window.setRange(0, 1000000)
+        self.stagnation_window.setSpecialValueText('Off')
+        self.stagnation_window.setStatusTip(
+            'Stop when the total best error has not improved in this many '
+            'iterations. (Off if 0)')
+
+        self.min_diversity = QDoubleSpinBox()
+        self.min_diversity.setRange(0, 1)
+        self.min_diversity.setDecimals(5)
+        self.min_diversity.setSingleStep(0.001)
+        self.min_diversity.setSpecialValueText('Off')
+        self.min_diversity.setStatusTip(
+            'Stop when the normalized mean distance of the particles to their '
+            'centroid falls below it, about 0.29 at the start. (Off if 0)')
+
+        self.time_budget = QSpinBox()
+        self.time_budget.setRange(0, 100000)
+        self.time_budget.setSuffix(' min')
+        self.time_budget.setSpecialValueText('Off')
+        self.time_budget.setStatusTip('Stop when the training has run for '
+                                      'this many minutes. (Off if 0)')
+
+        self.islands = QSpinBox()
+        self.islands.setRange(1, 64)
+        self.islands.setSpecialValueText('Off')
+        self.islands.setStatusTip(
+            'The number of sub-swarms of the population size, each in its own '
+            'process and exchanging the best particles periodically. (Off if '
+            '1)')
+
+        self.migration_interval = QSpinBox()
+        self.migration_interval.setRange(0, 1000000)
+        self.migration_interval.setValue(10)
+        self.migration_interval.setSpecialValueText('Never')
+        self.migration_interval.setStatusTip(
+            'The number of iterations between two migrations of the islands.')
+
+        self.migration_size = QSpinBox()
+        self.migration_size.setRange(1, 1000)
+        self.migration_size.setStatusTip(
+            'The number of particles each island sends in a migration.')
+
+        self.topology_selector = QComboBox()
+        self.topology_selector.addItems(list(TOPOLOGIES))
+        self.topology_selector.setStatusTip(
+            'Send the migrants to the next island, the best of them to every '
+            'island, or to a random island.')
+
+        inner_layout.addRow('Fitting Function:', self.fitness_selector)
         inner_layout.addRow('Iterating Times:', self.iter_times)
         inner_layout.addRow('Population Size:', self.population_size)
         inner_layout.addRow('Inertia Weight:', self.inertia_weight)
@@ -123,6 +216,16 @@ class TrainingPanel(Panel):
         inner_layout.addRow('Maximum of Velocity:', self.v_max)
         inner_layout.addRow('Number of Neuron:', self.nneuron)
         inner_layout.addRow('Maximum of SD:', self.sd_max)
+        inner_layout.addRow('Target Error:', self.target_err)
+        inner_layout.addRow('Stagnation Window:', self.stagnation_window)
+        inner_layout.addRow('Minimum Diversity:', self.min_diversity)
+        inner_layout.addRow('Time Budget:', self.time_budget)
+        inner_layout.addRow('Checkpoint File:', self.checkpoint)
+        inner_layout.addRow('Checkpoint Every:', self.checkpoint_every)
+        inner_layout.addRow('Islands:', self.islands)
+        inner_layout.addRow('Migration Interval:', self.migration_interval)
+        inner_layout.addRow('Migration Size:', self.migration_size)
+        inner_layout.addRow('Migration Topology:', self.topology_selector)
 
         self._layout.addWidget(group_box)
 
@@ -133,6 +236,7 @@ class TrainingPanel(Panel):
 
         self.current_iter_time = QLabel('--')
         self.current_error = QLabel('--')
+        self.error_histogram = QLabel('--')
         self.avg_error = QLabel('--')
         self.global_best_error = QLabel('--')
         self.total_best_error = QLabel('--')
@@ -140,14 +244,18 @@ class TrainingPanel(Panel):
 
         self.current_iter_time.setAlignment(Qt.AlignCenter)
         self.current_error.setAlignment(Qt.AlignCenter)
+        self.error_histogram.setAlignment(Qt.AlignCenter)
         self.avg_error.setAlignment(Qt.AlignCenter)
         self.global_best_error.setAlignment(Qt.AlignCenter)
         self.total_best_error.setAlignment(Qt.AlignCenter)
 
         self.current_iter_time.setStatusTip('The current iterating time of '
                                             'the PSO.')
-        self.current_error.setStatusTip('The current error from the fitting '
-                                        'function. ("( )": normalized error)')
+        self.current_error.setStatusTip('The median (minimum - maximum) error '
+                                        'of the swarm in current iteration.')
+        self.error_histogram.setStatusTip('The histogram of the errors of the '
+                                          'swarm in current iteration, from '
+                                          'the minimum to the maximum.')
         self.avg_error.setStatusTip('The average error from the fitting '
                                     'function in current iteration.  ("( )": '
                                     'normalized error)')
@@ -160,6 +268,7 @@ class TrainingPanel(Panel):
 
         inner_layout.addRow('Current Iterating Time:', self.current_iter_time)
         inner_layout.addRow('Current Error:', self.current_error)
+        inner_layout.addRow('Error Histogram:', self.error_histogram)
         inner_layout.addRow('Average Error:', self.avg_error)
         inner_layout.addRow('Global Best Error:', self.global_best_error)
         inner_layout.addRow('Total Best Error:', self.total_best_error)
@@ -172,16 +281,17 @@ class TrainingPanel(Panel):
         inner_layout = QVBoxLayout()
         group_box.setLayout(inner_layout)
 
-        self.err_chart = ErrorLineChart(1)
-        self.err_chart.setStatusTip('The history of error from the fitting '
-                                    'of the PSO for each data.')
+        self.err_chart = ErrorLineChart(3, ('Min', 'Median', 'Max'))
+        self.err_chart.setStatusTip('The history of the minimum, median and '
+                                    'maximum error of the swarm for each '
+                                    'progress report.')
         self.__err_x = 1
 
         self.iter_err_chart = ErrorLineChart(
-            3, ('Avg', 'Global Best', 'Total Best'))
-        self.iter_err_chart.setStatusTip('The history of average and least '
-                                         'error from the fitting of the PSO '
-                                         'for each iteration.')
+            3, ('Avg', 'Global Best', 'Total Best'), window=None)
+        self.iter_err_chart.setStatusTip('The whole history of average and '
+                                         'least error from the fitting of the '
+                                         'PSO for each iteration.')
         self.iter_err_chart.setMinimumHeight(150)
 
         inner_layout.addWidget(QLabel('Current Error'))
@@ -193,9 +303,12 @@ class TrainingPanel(Panel):
     @Slot()
     def __init_widgets(self):
         self.start_btn.setDisabled(True)
+        self.resume_btn.setDisabled(True)
         self.stop_btn.setEnabled(True)
         self.multicore_cb.setDisabled(True)
+        self.async_cb.setDisabled(True)
         self.data_selector.setDisabled(True)
+        self.fitness_selector.setDisabled(True)
         self.iter_times.setDisabled(True)
         self.population_size.setDisabled(True)
         self.inertia_weight.setDisabled(True)
@@ -204,6 +317,16 @@ class TrainingPanel(Panel):
         self.v_max.setDisabled(True)
         self.nneuron.setDisabled(True)
         self.sd_max.setDisabled(True)
+        self.checkpoint.setDisabled(True)
+        self.target_err.setDisabled(True)
+        self.stagnation_window.setDisabled(True)
+        self.min_diversity.setDisabled(True)
+        self.time_budget.setDisabled(True)
+        self.checkpoint_every.setDisabled(True)
+        self.islands.setDisabled(True)
+        self.migration_interval.setDisabled(True)
+        self.migration_size.setDisabled(True)
+        self.topology_selector.setDisabled(True)
         self.err_chart.clear()
         self.iter_err_chart.clear()
         self.__err_x = 1
@@ -211,9 +334,12 @@ class TrainingPanel(Panel):
     @Slot()
     def __reset_widgets(self):
         self.start_btn.setEnabled(True)
+        self.resume_btn.setEnabled(True)
         self.stop_btn.setDisabled(True)
         self.multicore_cb.setEnabled(True)
+        self.async_cb.setEnabled(True)
         self.data_selector.setEnabled(True)
+        self.fitness_selector.setEnabled(True)
         self.iter_times.setEnabled(True)
         self.population_size.setEnabled(True)
         self.inertia_weight.setEnabled(True)
@@ -222,6 +348,16 @@ class TrainingPanel(Panel):
         self.v_max.setEnabled(True)
         self.nneuron.setEnabled(True)
         self.sd_max.setEnabled(True)
+        self.checkpoint.setEnabled(True)
+        self.target_err.setEnabled(True)
+        self.stagnation_window.setEnabled(True)
+        self.min_diversity.setEnabled(True)
+        self.time_budget.setEnabled(True)
+        self.checkpoint_every.setEnabled(True)
+        self.islands.setEnabled(True)
+        self.migration_interval.setEnabled(True)
+        self.migration_size.setEnabled(True)
+        self.topology_selector.setEnabled(True)
         self.progressbar.setMinimum(0)
         self.progressbar.setMaximum(100)
 
@@ -230,52 +366,123 @@ class TrainingPanel(Panel):
         self.progressbar.setMinimum(0)
         self.progressbar.setMaximum(0)
 
-    @Slot(int)
-    def __show_current_iter_time(self, value):
-        self.current_iter_time.setText(str(value + 1))
-        self.progressbar.setValue(value + 1)
-
-    @Slot(float)
-    def __show_current_error(self, value):
-        self.current_error.setText('{:.5f} ({:.5f})'.format(value, value / 40))
-        self.err_chart.append_point(self.__err_x, value)
+    @Slot(dict)
+    def __show_progress(self, progress):
+        iter_time = min(progress['iteration'] + 1, self.iter_times.value())
+        self.current_iter_time.setText(str(iter_time))
+        self.progressbar.setValue(iter_time)
+
+        summary = progress['summary']
+        percentiles = dict(summary['percentiles'])
+        self.current_error.setText('{:.5f} ({:.5f} - {:.5f})'.format(
+            percentiles[50], summary['min'], summary['max']))
+        self.error_histogram.setText(sparkline(summary['histogram'][0]))
+        self.err_chart.append_point(self.__err_x, summary['max'], 2)
+        self.err_chart.append_point(self.__err_x, percentiles[50], 1)
+        self.err_chart.append_point(self.__err_x, summary['min'], 0)
         self.__err_x += 1
 
-    @Slot(float, float, float)
-    def __show_iter_error(self, avg, glob, total):
+        iterations, avgs, globs, totals = zip(*progress['history'])
+        xs = [iteration + 1 for iteration in iterations]
+        self.iter_err_chart.append_points(xs, totals, 2)
+        self.iter_err_chart.append_points(xs, globs, 1)
+        self.iter_err_chart.append_points(xs, avgs, 0)
+        avg, glob, total = avgs[-1], globs[-1], totals[-1]
         self.avg_error.setText('{:.5f} ({:.5f})'.format(avg, avg / 40))
         self.global_best_error.setText(
             '{:.5f} ({:.5f})'.format(glob, glob / 40))
         self.total_best_error.setText(
             '{:.5f} ({:.5f})'.format(total, total / 40))
-        self.iter_err_chart.append_point(
-            int(self.current_iter_time.text()), total, 2)
-        self.iter_err_chart.append_point(
-            int(self.current_iter_time.text()), glob, 1)
-        self.iter_err_chart.append_point(
-            int(self.current_iter_time.text()), avg, 0)
 
+    @Slot()
     def __run(self):
+        self.__start_pso()
+
+    @Slot()
+    def __resume(self):
+        filepath, _ = QFileDialog.getOpenFileName(
+            self, 'Resume from Checkpoint', self.checkpoint.text(),
+            'Checkpoint (*.npz);;All Files (*)')
+        if not filepath:
+            return
+        if not self.checkpoint.text():
+            # keep checkpointing the resumed training
+            self.checkpoint.setText(filepath)
+        self.__start_pso(filepath)
+
+    def __start_pso(self, resume=None):
         self.progressbar.setMaximum(self.iter_times.value())
 
         self.__current_dataset = self.datasets[
             self.data_selector.currentText()]
-
-        self.__pso = PSO(self.iter_times.value(), self.population_size.value(),
-                         self.inertia_weight.value(),
-                         self.cognitive_const_rand_upper.value(),
-                         self.social_const_rand_upper.value(),
-                         self.v_max.value(), self.nneuron.value(),
-                         self.__current_dataset, self.sd_max.value(),
-                         is_multicore=self.multicore_cb.isChecked())
+        self.testing_panel.reference_data = self.__current_dataset
+        if self.fitness_selector.currentIndex() == 1:
+            fitness = SimulationFitness(
+                list(self.testing_panel.maps.values()), self.nneuron.value())
+        else:
+            fitness = None
+
+        early_stopping = EarlyStopping(
+            target_err=self.target_err.value() or None,
+            window=self.stagnation_window.value() or None,
+            min_diversity=self.min_diversity.value() or None,
+            time_budget=self.time_budget.value() * 60 or None)
+
+        if self.islands.value() > 1:
+            if resume or self.checkpoint.text():
+                self.testing_panel.print_console(
+                    'Error: The island model does not support checkpoints.')
+                return
+            if self.async_cb.isChecked():
+                self.testing_panel.print_console(
+                    'Error: The islands iterate synchronously. Uncheck '
+                    '"Asynchronous" to train islands.')
+                return
+            if not self.multicore_cb.isChecked():
+                self.testing_panel.print_console(
+                    'Error: Every island runs in its own process. Check '
+                    '"Multicore" to train islands.')
+                return
+
+        try:
+            self.__pso = PSO(
+                self.iter_times.value(), self.population_size.value(),
+                self.inertia_weight.value(),
+                self.cognitive_const_rand_upper.value(),
+                self.social_const_rand_upper.value(),
+                self.v_max.value(), self.nneuron.value(),
+                self.__current_dataset, self.sd_max.value(),
+                is_multicore=self.multicore_cb.isChecked(), fitness=fitness,
+                checkpoint=self.checkpoint.text() or None,
+                checkpoint_every=self.checkpoint_every.value(),
+                resume=resume, early_stopping=early_stopping,
+                is_async=self.async_cb.isChecked(),
+                islands=self.islands.value(),
+                migration_interval=self.migration_interval.value(),
+                migration_size=self.migration_size.value(),
+                topology=self.topology_selector.currentText())
+        except (OSError, ValueError, KeyError) as err:
+            if resume is not None:
+                self.testing_panel.print_console(
+                    'Error: Cannot resume from {}. {}'.format(resume, err))
+            else:
+                self.testing_panel.print_console(
+                    'Error: Cannot start training. {}'.format(err))
+            return
         self.threads.append(self.__pso)
         self.stop_btn.clicked.connect(self.__pso.stop)
         self.__pso.started.connect(self.__init_widgets)
         self.__pso.finished.connect(self.__reset_widgets)
-        self.__pso.sig_current_iter_time.connect(self.__show_current_iter_time)
-        self.__pso.sig_current_error.connect(self.__show_current_error)
-        self.__pso.sig_iter_error.connect(self.__show_iter_error)
+        self.__pso.sig_progress.connect(self.__show_progress)
         self.__pso.sig_indicate_busy.connect(self.__indicate_busy)
         self.__pso.sig_console.connect(self.testing_panel.print_console)
         self.__pso.sig_rbfn.connect(self.testing_panel.load_rbfn)
         self.__pso.start()
+
+
+def sparkline(counts):
+    """Render the counts of a histogram as a line of block characters."""
+    blocks = ' \u2581\u2582\u2583\u2584\u2585\u2586\u2587\u2588'
+    top = max(max(counts), 1)
+    return ''.join(blocks[int(round(c / top * (len(blocks) - 1)))]
+                   for c in counts)
@@ -0,0 +1,259 @@
+""" The headless entry point which trains the RBFN by PSO without GUI.
+
+Usage: python3 train.py data/train4dAll.txt -o model.rbfn
+       python3 train.py --fitness simulation --maps case01 case02 -o model.rbfn
+       python3 train.py data/train4dAll.txt --checkpoint run.npz
+       python3 train.py data/train4dAll.txt --resume run.npz
+       python3 train.py data/train4dAll.txt --islands 4 --topology ring
+
+"""
+
+import argparse
+import functools
+import multiprocessing
+import sys
+
+from pso_car.backend.engine import EarlyStopping, PSOEngine
+from pso_car.backend.islands import TOPOLOGIES, IslandEngine
+from pso_car.backend.loader import read_maps, read_training_dataset
+from pso_car.backend.lookup import LookupTable, lookup_error_report
+from pso_car.backend.model import TrainedModel, write_model
+from pso_car.backend.simfitness import SimulationFitness
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Train the RBFN controlling the car by PSO.')
+    parser.add_argument('dataset', nargs='?',
+                        help='the path of the training dataset (required by '
+                        'the dataset fitting function)')
+    parser.add_argument('-o', '--output', default='model.rbfn',
+                        help='the path to write the trained model, which can '
+                        'be loaded by the GUI (default: %(default)s)')
+    parser.add_argument('--iter-times', type=int, default=200,
+                        help='the total iterating times (default: '
+                        '%(default)s)')
+    parser.add_argument('--population-size', type=int, default=100,
+                        help='the population size (default: %(default)s)')
+    parser.add_argument('--inertia-weight', type=float, default=1,
+                        help='the inertia weight of the velocity (default: '
+                        '%(default)s)')
+    parser.add_argument('--cognitive-const-upper', type=float, default=2,
+                        help='the random upper bound for cognitive accelerate '
+                        'constant (default: %(default)s)')
+    parser.add_argument('--social-const-upper', type=float, default=3,
+                        help='the random upper bound for social accelerate '
+                        'constant (default: %(default)s)')
+    parser.add_argument('--v-max', type=float, default=5,
+                        help='the maximum of velocity (default: %(default)s)')
+    parser.add_argument('--nneuron', type=int, default=6,
+                        help='the number of RBFN neuron (default: '
+                        '%(default)s)')
+    parser.add_argument('--sd-max', type=float, default=10,
+                        help='the random range maximum of standard deviation '
+                        'of each neuron (default: %(default)s)')
+    parser.add_argument('--fitness', choices=('dataset', 'simulation'),
+                        default='dataset',
+                        help='fit the training dataset, or drive the car on '
+                        'the maps (default: %(default)s)')
+    parser.add_argument('--maps', nargs='+', default=None,
+                        help='the names of the maps for the simulation '
+                        'fitting function (default: every map)')
+    parser.add_argument('--maps-folder', default='maps',
+                        help='the folder of the maps (default: %(default)s)')
+    parser.add_argument('--max-steps', type=int, default=1000,
+                        help='the maximum of moves in an episode of the '
+                        'simulation fitting function (default: %(default)s)')
+    parser.add_argument('--target-err', type=float, default=None,
+                        help='stop when the total best error reaches it')
+    parser.add_argument('--stagnation-window', type=int, default=None,
+                        help='stop when the total best error has not improved '
+                        'by more than --stagnation-tol in this many '
+                        'iterations')
+    parser.add_argument('--stagnation-tol', type=float, default=0.0,
+                        help='the least improvement in the stagnation window '
+                        '(default: %(default)s)')
+    parser.add_argument('--min-diversity', type=float, default=None,
+                        help='stop when the normalized mean distance of the '
+                        'particles to their centroid falls below it (about '
+                        '0.29 at the start)')
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help='stop when the training has run for this many '
+                        'seconds')
+    parser.add_argument('--checkpoint', default=None,
+                        help='the path of the checkpoint file of the whole '
+                        'swarm, written periodically and when the training '
+                        'ends (default: the resumed checkpoint, or none)')
+    parser.add_argument('--checkpoint-every', type=int, default=100,
+                        help='the number of iterations between two '
+                        'checkpoints (default: %(default)s)')
+    parser.add_argument('--resume', default=None,
+                        help='continue the training from a checkpoint file '
+                        'with the same dataset or maps')
+    parser.add_argument('--lookup-resolution', type=int, default=None,
+                        help='report the errors of the lookup table with this '
+                        'number of grid points in each dimension against the '
+                        'trained model on the training dataset')
+    parser.add_argument('--lookup-range', type=float, nargs=2, default=None,
+                        metavar=('MIN', 'MAX'),
+                        help='the range of every radar distance covered by '
+                        'the lookup table (default: the input range of the '
+                        'model)')
+    parser.add_argument('--asynchronous', action='store_true',
+                        help='move every particle as soon as its own fitting '
+                        'returns instead of waiting for the whole swarm')
+    parser.add_argument('--async-batch', type=int, default=None,
+                        help='the number of particles in each task of the '
+                        'asynchronous mode (default: a quarter of the share '
+                        'of each worker)')
+    parser.add_argument('--islands', type=int, default=1,
+                        help='the number of sub-swarms of --population-size '
+                        'particles, each in its own process and iterating '
+                        'synchronously (default: %(default)s)')
+    parser.add_argument('--migration-interval', type=int, default=10,
+                        help='the number of iterations between two migrations '
+                        'of the islands, or 0 to never migrate (default: '
+                        '%(default)s)')
+    parser.add_argument('--migration-size', type=int, default=1,
+                        help='the number of particles each island sends in a '
+                        'migration (default: %(default)s)')
+    parser.add_argument('--topology', choices=TOPOLOGIES, default='ring',
+                        help='send the migrants to the next island, the best '
+                        'of them to every island, or to a random island '
+                        '(default: %(default)s)')
+    parser.add_argument('--single-core', action='store_true',
+                        help='evaluate the fitting function in this process')
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help='do not print the progress of each iteration')
+    args = parser.parse_args(argv)
+    if args.fitness == 'dataset' and args.dataset is None:
+        parser.error('the dataset is required by the dataset fitting '
+                     'function')
+    if args.islands > 1:
+        if args.checkpoint or args.resume:
+            parser.error('the island model does not support checkpoints')
+        if args.asynchronous or args.async_batch is not None:
+            parser.error('the islands iterate synchronously, so --islands '
+                         'does not support --asynchronous or --async-batch')
+        if args.single_core:
+            parser.error('every island runs in its own process, so --islands '
+                         'does not support --single-core')
+    if args.lookup_range is not None and \
+            args.lookup_range[0] >= args.lookup_range[1]:
+        parser.error('the minimum of --lookup-range must be less than the '
+                     'maximum')
+    if args.fitness == 'simulation':
+        # the maps driven by the simulation fitting function
+        args.map_data = read_maps(args.maps_folder)
+        if not args.map_data:
+            parser.error('there is no map in {}'.format(args.maps_folder))
+        unknown = [name for name in args.maps or () if name not in
+                   args.map_data]
+        if unknown:
+            parser.error('unknown maps: {} (choose from {})'.format(
+                ', '.join(unknown), ', '.join(args.map_data)))
+    return args
+
+
+def print_progress(iter_times, progress):
+    if progress.iteration < iter_times:
+        label = 'iter {}'.format(progress.iteration + 1)
+    else:
+        label = 'final'
+    print('{}: avg {:.5f}, global best {:.5f}, total best {:.5f}'.format(
+        label, progress.errs.mean(), progress.global_best_err,
+        progress.total_best_err))
+
+
+def print_lookup_report(position, nneuron, dataset, resolution, mean_range,
+                        lookup_range=None):
+    if dataset is None:
+        print('The lookup table report requires the training dataset.')
+        return
+    model = TrainedModel(position, nneuron, mean_range)
+    if lookup_range is None:
+        lookup_range = model.mean_range
+    table = LookupTable.from_model(model, resolution,
+                                   (tuple(lookup_range),) * model.data_dim)
+    report = lookup_error_report(table, model, dataset[:, :-1],
+                                 dataset[:, -1])
+    print('Lookup table ({} points per dimension) against the model: MAE '
+          '{mae:.5f}, max {max_error:.5f}, RMSE {rmse:.5f}, {out_of_range:.2%} '
+          'out of range'.format(resolution, **report))
+    print('MAE against the expected outputs: model {model_mae:.5f}, table '
+          '{table_mae:.5f}'.format(**report))
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.fitness == 'simulation':
+        names = args.map_data.keys() if args.maps is None else args.maps
+        dataset = None
+        fitness = SimulationFitness([args.map_data[name] for name in names],
+                                    args.nneuron, args.max_steps)
+    else:
+        dataset = read_training_dataset(args.dataset)
+        fitness = None
+    early_stopping = EarlyStopping(args.target_err, args.stagnation_window,
+                                   args.stagnation_tol, args.min_diversity,
+                                   args.time_budget)
+    if args.islands > 1:
+        engine = IslandEngine(args.islands, args.iter_times,
+                              args.population_size, args.inertia_weight,
+                              args.cognitive_const_upper,
+                              args.social_const_upper, args.v_max,
+                              args.nneuron, dataset, args.sd_max,
+                              fitness=fitness,
+                              migration_interval=args.migration_interval,
+                              migration_size=args.migration_size,
+                              topology=args.topology,
+                              early_stopping=early_stopping)
+    else:
+        engine = PSOEngine(args.iter_times, args.population_size,
+                           args.inertia_weight, args.cognitive_const_upper,
+                           args.social_const_upper, args.v_max, args.nneuron,
+                           dataset, args.sd_max,
+                           is_multicore=not args.single_core, fitness=fitness,
+                           checkpoint=args.checkpoint or args.resume,
+                           checkpoint_every=args.checkpoint_every,
+                           early_stopping=early_stopping,
+                           is_async=args.asynchronous,
+                           async_batch=args.async_batch)
+    if args.resume is not None:
+        try:
+            engine.load_checkpoint(args.resume)
+        except (OSError, ValueError, KeyError) as err:
+            sys.exit('Error: Cannot resume from {}. {}'.format(args.resume,
+                                                              err))
+        print('Resume from iteration {} with the hyperparameters of the '
+              'checkpoint: {}.'.format(engine.iteration + 1, ', '.join(
+                  '{} {:g}'.format(name, value) for name, value in
+                  engine.hyperparameters.items())))
+    try:
+        position, err = engine.run(
+            None if args.quiet else functools.partial(print_progress,
+                                                      args.iter_times))
+    except KeyboardInterrupt:
+        position, err = engine.total_best_position, engine.total_best_err
+        print('Interrupted.')
+        if engine.checkpoint is not None:
+            print('Resume from the last checkpoint by --resume {}.'.format(
+                engine.checkpoint))
+    if engine.stop_reason is not None:
+        print('Early stopping at iteration {}: {}'.format(
+            engine.iteration + 1, engine.stop_reason))
+    if position is None:
+        print('No iteration has been evaluated.')
+        return
+    print('The least error: %f' % err)
+    if args.lookup_resolution is not None:
+        print_lookup_report(position, args.nneuron, dataset,
+                            args.lookup_resolution, engine.fitness.mean_range,
+                            args.lookup_range)
+    write_model(args.output, position, args.nneuron, engine.fitness.mean_range)
+    print('The trained model has been written to {}.'.format(args.output))
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    main()